@@ -0,0 +1,91 @@
+"""baseline schema
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18
+
+The original schema: users, categories, budgets and transactions, before
+any of the performance work added columns or tables. A database created
+from that original code can be marked as being at this revision with
+``alembic stamp 0001_baseline`` and then brought forward with
+``alembic upgrade head``. Two revisions add derived data that has to be
+backfilled afterwards (see their docstrings):
+
+    python -m app.cli rebuild-rollups                 # 0002_daily_rollups
+    python -m app.cli check-budget-counters --repair  # 0003_budget_counters
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("hashed_password", sa.String(length=255), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "categories",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("type", sa.String(length=20), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_categories_id", "categories", ["id"])
+    op.create_index("ix_categories_name", "categories", ["name"], unique=True)
+
+    op.create_table(
+        "budgets",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("limit", sa.Numeric(10, 2), nullable=False),
+        sa.Column("start_date", sa.Date(), nullable=False),
+        sa.Column("end_date", sa.Date(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_budgets_id", "budgets", ["id"])
+
+    op.create_table(
+        "transactions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("amount", sa.Numeric(10, 2), nullable=False),
+        sa.Column("description", sa.String(length=255), nullable=True),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=True),
+        sa.Column("budget_id", sa.Integer(), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("type", sa.String(length=20), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(["budget_id"], ["budgets.id"]),
+        sa.ForeignKeyConstraint(["category_id"], ["categories.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_transactions_id", "transactions", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("transactions")
+    op.drop_table("budgets")
+    op.drop_table("categories")
+    op.drop_table("users")
@@ -0,0 +1,37 @@
+"""daily_rollups table for reports
+
+Revision ID: 0002_daily_rollups
+Revises: 0001_baseline
+Create Date: 2026-10-18
+
+Per-day income/expense sums that the app keeps up to date on every
+transaction write. The table starts empty: on a database that already has
+transactions, run ``python -m app.cli rebuild-rollups`` once the upgrade
+to head has finished, otherwise reports under-count existing history.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002_daily_rollups"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_rollups",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("category_key", sa.Integer(), nullable=False),
+        sa.Column("type", sa.String(length=20), nullable=False),
+        sa.Column("total_amount", sa.Numeric(14, 2), nullable=False),
+        sa.Column("tx_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "date", "category_key", "type"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("daily_rollups")
@@ -0,0 +1,35 @@
+"""spent_total/tx_count counters on budgets
+
+Revision ID: 0003_budget_counters
+Revises: 0002_daily_rollups
+Create Date: 2026-10-18
+
+The counters are maintained from transaction writes and start at zero.
+On a database with existing transactions, run
+``python -m app.cli check-budget-counters --repair`` once the upgrade to
+head has finished so budgets/status reports the real spend.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003_budget_counters"
+down_revision = "0002_daily_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("budgets") as batch_op:
+        batch_op.add_column(
+            sa.Column("spent_total", sa.Numeric(12, 2), server_default="0", nullable=False)
+        )
+        batch_op.add_column(
+            sa.Column("tx_count", sa.Integer(), server_default="0", nullable=False)
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("budgets") as batch_op:
+        batch_op.drop_column("tx_count")
+        batch_op.drop_column("spent_total")
@@ -0,0 +1,30 @@
+"""users.token_version for access token revocation
+
+Revision ID: 0004_token_version
+Revises: 0003_budget_counters
+Create Date: 2026-10-18
+
+Access tokens carry the user's token_version; bumping it revokes every
+token issued so far. Existing users start at 0, which is what tokens
+issued before this revision are treated as.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004_token_version"
+down_revision = "0003_budget_counters"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.add_column(
+            sa.Column("token_version", sa.Integer(), server_default="0", nullable=False)
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("token_version")
@@ -0,0 +1,43 @@
+"""composite indexes for the transactions, categories and budgets hot paths
+
+Revision ID: 0006_hot_path_indexes
+Revises: 0005_refresh_tokens
+Create Date: 2026-10-18
+
+Every list/report query filters on user_id and orders or ranges on date
+(or name / start_date); until now only the primary keys were indexed, so
+each of them scanned the whole table. SQLite has no INCLUDE clause, so the
+"covering" amount column is a trailing key column.
+"""
+from alembic import op
+
+
+revision = "0006_hot_path_indexes"
+down_revision = "0005_refresh_tokens"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("ix_transactions_user_id_date_id", "transactions", ["user_id", "date", "id"]),
+    (
+        "ix_transactions_user_id_type_date_amount",
+        "transactions",
+        ["user_id", "type", "date", "amount"],
+    ),
+    ("ix_transactions_budget_id_type_date", "transactions", ["budget_id", "type", "date"]),
+    ("ix_transactions_category_id", "transactions", ["category_id"]),
+    ("ix_categories_user_id_name", "categories", ["user_id", "name"]),
+    ("ix_budgets_user_id_start_date", "budgets", ["user_id", "start_date"]),
+)
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+    # Let the planner see the new indexes' selectivity right away
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
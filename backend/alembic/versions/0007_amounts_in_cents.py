@@ -0,0 +1,55 @@
+"""store money amounts as integer cents
+
+Revision ID: 0007_amounts_in_cents
+Revises: 0006_hot_path_indexes
+Create Date: 2026-10-18
+
+Numeric(…, 2) columns are REAL/TEXT underneath on SQLite, so SUMs were
+float arithmetic followed by a Decimal conversion per row. The app now
+maps these columns with models.Money (integer cents); this converts the
+stored values and the column types.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007_amounts_in_cents"
+down_revision = "0006_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+# (table, column, previous type, server default)
+MONEY_COLUMNS = (
+    ("transactions", "amount", sa.Numeric(10, 2), None),
+    ("budgets", "limit", sa.Numeric(10, 2), None),
+    ("budgets", "spent_total", sa.Numeric(12, 2), "0"),
+    ("daily_rollups", "total_amount", sa.Numeric(14, 2), None),
+)
+
+
+def upgrade() -> None:
+    for table, column, numeric_type, server_default in MONEY_COLUMNS:
+        op.execute(
+            f'UPDATE {table} SET "{column}" = CAST(ROUND("{column}" * 100) AS INTEGER)'
+        )
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                column,
+                existing_type=numeric_type,
+                type_=sa.Integer(),
+                existing_nullable=False,
+                existing_server_default=server_default,
+            )
+
+
+def downgrade() -> None:
+    for table, column, numeric_type, server_default in MONEY_COLUMNS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                column,
+                existing_type=sa.Integer(),
+                type_=numeric_type,
+                existing_nullable=False,
+                existing_server_default=server_default,
+            )
+        op.execute(f'UPDATE {table} SET "{column}" = ROUND("{column}" / 100.0, 2)')
@@ -0,0 +1,32 @@
+"""user_tombstones table
+
+Revision ID: 0008_user_tombstones
+Revises: 0007_amounts_in_cents
+Create Date: 2026-10-18
+
+Deleted user ids, so every process's token version table rejects their
+access tokens after its next reload, not just the process that deleted
+them. Rows older than the access token lifetime can be removed with
+``python -m app.cli purge-user-tombstones``.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008_user_tombstones"
+down_revision = "0007_amounts_in_cents"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_tombstones",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_tombstones")
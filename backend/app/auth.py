@@ -1,26 +1,282 @@
 # backend/app/auth.py
+import asyncio
+import hashlib
+import logging
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
 
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from pydantic import ValidationError
+from sqlalchemy import event, inspect, or_
 from sqlalchemy.orm import Session
 
 from . import models, schemas
+from .caching import GenerationalCache, InvalidateOnCommit
 from .config import security_settings
-from .db import get_db
+from .deps import DbSession, get_read_session, run_db
+from .metrics import registry
 
 SECRET_KEY = security_settings.secret_key
 ALGORITHM = security_settings.algorithm
 ACCESS_TOKEN_EXPIRE_MINUTES = security_settings.access_token_expire_minutes
+REFRESH_TOKEN_EXPIRE_DAYS = security_settings.refresh_token_expire_days
+# Spent refresh tokens are kept this long so that replaying one is still
+# recognised as reuse (which revokes the whole family); then they are purged
+REVOKED_REFRESH_TOKEN_RETENTION = timedelta(days=1)
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# Pinning min/max to the configured cost makes any other cost "needs update",
+# which is what drives rehash-on-login after BUDGET_APP_PASSWORD_HASH_ROUNDS changes.
+_HASH_ROUNDS = security_settings.password_hash_rounds
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=_HASH_ROUNDS,
+    pbkdf2_sha256__min_rounds=_HASH_ROUNDS,
+    pbkdf2_sha256__max_rounds=_HASH_ROUNDS,
+)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller, detached from any session."""
+
+    id: int
+    email: str
+
+
+# Resolved principals of legacy email-only tokens, owned by token subject
+principal_cache: GenerationalCache[Principal] = GenerationalCache(
+    security_settings.user_cache_ttl_seconds,
+    security_settings.user_cache_max_entries,
+)
+_principal_invalidations = InvalidateOnCommit(principal_cache, "principal_cache_subjects")
+
+registry.counter(
+    "principal_cache_hits_total",
+    "Legacy token subjects resolved from the in-process principal cache.",
+    callback=lambda: principal_cache.hits,
+)
+registry.counter(
+    "principal_cache_misses_total",
+    "Legacy token subjects that had to be looked up in the database.",
+    callback=lambda: principal_cache.misses,
+)
+registry.gauge(
+    "principal_cache_entries",
+    "Principals currently held in the in-process cache.",
+    callback=lambda: principal_cache.stats()["size"],
+)
+
+
+def invalidate_principal_on_commit(session: Session, email: str) -> None:
+    """Drop the cached principal for ``email`` once ``session`` commits.
+
+    Flushed ``User`` changes are picked up automatically; bulk UPDATE/DELETE
+    statements against ``users`` must call this themselves.
+    """
+    _principal_invalidations.add(session, email)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_principal_invalidations(session, flush_context):
+    for obj in session.deleted:
+        if isinstance(obj, models.User):
+            invalidate_principal_on_commit(session, obj.email)
+    for obj in session.dirty:
+        if not isinstance(obj, models.User):
+            continue
+        state = inspect(obj)
+        email_history = state.attrs.email.history
+        if email_history.has_changes():
+            for email in (*email_history.deleted, *email_history.added):
+                invalidate_principal_on_commit(session, email)
+        elif state.attrs.hashed_password.history.has_changes():
+            invalidate_principal_on_commit(session, obj.email)
+
+
+class TokenVersionTable:
+    """
+    In-memory denylist built from ``users.token_version``: only users whose
+    version was ever bumped are held, so tokens carrying ``uid``/``ver``
+    are checked without a query and memory follows the number of
+    revocations, not the number of users.
+
+    A user missing from the table is at version 0. A token claiming a
+    *higher* version than the table knows was issued after a revocation
+    this process has not seen yet; the caller confirms it with a
+    single-row lookup. Versions only ever go up, so a reload never undoes
+    a revocation this process has already seen.
+
+    ``start`` reloads the table every ``refresh_seconds`` on a background
+    thread, off the request path; revocations committed in another
+    process are honoured here from the next reload on.
+    """
+
+    # Stored for deleted users (see models.UserTombstone); no token carries it
+    DELETED = -1
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self, db: Session) -> None:
+        rows = (
+            db.query(models.User.id, models.User.token_version)
+            .filter(models.User.token_version > 0)
+            .all()
+        )
+        deleted = (
+            db.query(models.UserTombstone.user_id)
+            .filter(models.UserTombstone.deleted_at >= _tombstone_cutoff())
+            .all()
+        )
+        with self._lock:
+            previous = self._versions
+            versions = {user_id: self.DELETED for (user_id,) in deleted}
+            for user_id, version in rows:
+                versions[user_id] = max(version, previous.get(user_id, version))
+            self._versions = versions
+
+    def start(self, session_factory: Callable[[], Session]) -> None:
+        """Load now and then every ``refresh_seconds`` (0 disables reloads)."""
+        if self.refresh_seconds <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(session_factory,),
+            name="token-versions",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def _run(self, session_factory: Callable[[], Session]) -> None:
+        while True:
+            try:
+                with session_factory() as db:
+                    self.load(db)
+            except Exception:
+                logger.exception("Could not reload token versions")
+            if self._stop.wait(self.refresh_seconds):
+                return
+
+    def get(self, user_id: int) -> int:
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def set(self, user_id: int, version: int) -> None:
+        with self._lock:
+            version = max(version, self._versions.get(user_id, version))
+            if version:
+                self._versions[user_id] = version
+            else:
+                # Version 0 is the default; also lifts a tombstone for a
+                # reused id
+                self._versions.pop(user_id, None)
+
+    def discard(self, user_id: int) -> None:
+        with self._lock:
+            self._versions[user_id] = self.DELETED
+
+    def clear(self) -> None:
+        with self._lock:
+            self._versions.clear()
+
+
+token_versions = TokenVersionTable(security_settings.token_version_refresh_seconds)
+
+
+def revoke_tokens(user: models.User) -> None:
+    """Invalidate every access and refresh token issued to ``user`` so far.
+
+    Used by POST /auth/logout and refresh token reuse detection. Takes
+    effect in this process on commit and in others on their next table
+    reload. Legacy email-only tokens carry no version and are not affected.
+    """
+    user.token_version = (user.token_version or 0) + 1
+
+
+def _tombstone_cutoff() -> datetime:
+    # Tombstones older than the access token lifetime guard no live token
+    return datetime.utcnow() - timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+
+
+def purge_user_tombstones(db: Session) -> int:
+    """Delete tombstones no live access token can refer to; the caller commits."""
+    return (
+        db.query(models.UserTombstone)
+        .filter(models.UserTombstone.deleted_at < _tombstone_cutoff())
+        .delete(synchronize_session=False)
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_token_version_changes(session, flush_context):
+    changes: Dict[int, Optional[int]] = {}
+    created = [obj.id for obj in session.new if isinstance(obj, models.User)]
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, models.User)]
+    for user_id in created:
+        changes[user_id] = 0
+    for user_id in deleted:
+        changes[user_id] = None
+    for obj in session.dirty:
+        if isinstance(obj, models.User) and inspect(obj).attrs.token_version.history.has_changes():
+            changes[obj.id] = obj.token_version
+
+    # Tombstones are written in the same transaction, so deletes made by any
+    # process reach every table on its next reload. SQLite may hand a
+    # deleted id to the next new user, which lifts the tombstone again.
+    tombstones = models.UserTombstone.__table__
+    if created or deleted:
+        session.connection().execute(
+            tombstones.delete().where(tombstones.c.user_id.in_(created + deleted))
+        )
+    if deleted:
+        now = datetime.utcnow()
+        session.connection().execute(
+            tombstones.insert(),
+            [{"user_id": user_id, "deleted_at": now} for user_id in deleted],
+        )
+    if changes:
+        session.info.setdefault("token_version_changes", {}).update(changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_token_version_changes(session):
+    for user_id, version in session.info.pop("token_version_changes", {}).items():
+        if version is None:
+            token_versions.discard(user_id)
+        else:
+            token_versions.set(user_id, version)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_token_version_changes(session):
+    session.info.pop("token_version_changes", None)
+
+
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
@@ -29,6 +285,78 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify, and return a fresh hash if the stored one uses an outdated cost."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Dedicated, bounded thread pool for pbkdf2 so a burst of logins queues
+    here instead of starving the threadpool every other route runs on.
+
+    hashlib's pbkdf2 releases the GIL, so threads hash in parallel. At most
+    ``workers + max_pending`` jobs are admitted; past that callers get a 503
+    instead of joining an unbounded queue.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, max_pending)
+        self._admitted = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def admitted(self) -> int:
+        return self._admitted
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        with self._lock:
+            if self._admitted >= self.capacity:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many concurrent authentication requests.",
+                    headers={"Retry-After": "1"},
+                )
+            self._admitted += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+            executor = self._executor
+        try:
+            return await asyncio.wrap_future(executor.submit(fn, *args))
+        finally:
+            with self._lock:
+                self._admitted -= 1
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHasher(
+    security_settings.password_hash_workers,
+    security_settings.password_hash_max_pending,
+)
+
+registry.gauge(
+    "password_hash_jobs",
+    "Password hashing jobs running or queued on the dedicated pool.",
+    callback=lambda: password_hasher.admitted,
+)
+registry.gauge(
+    "password_hash_jobs_max",
+    "Jobs the password hashing pool admits before answering 503.",
+    callback=lambda: password_hasher.capacity,
+)
+
+
 def create_access_token(
     data: dict, expires_delta: Optional[timedelta] = None
 ) -> str:
@@ -41,24 +369,149 @@ def create_access_token(
     return encoded_jwt
 
 
+def access_token_claims(user: models.User) -> Dict[str, Any]:
+    return {"sub": user.email, "uid": user.id, "ver": user.token_version}
+
+
+def _hash_refresh_token(token: str) -> str:
+    # Tokens are 256 random bits, so a fast digest is enough (unlike passwords)
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def purge_refresh_tokens(db: Session, user_id: Optional[int] = None) -> int:
+    """
+    Delete expired refresh tokens and ones revoked longer than
+    ``REVOKED_REFRESH_TOKEN_RETENTION`` ago, for one user or everyone.
+    Returns the number of rows deleted; the caller commits.
+    """
+    now = datetime.utcnow()
+    query = db.query(models.RefreshToken).filter(
+        or_(
+            models.RefreshToken.expires_at < now,
+            models.RefreshToken.revoked_at < now - REVOKED_REFRESH_TOKEN_RETENTION,
+        )
+    )
+    if user_id is not None:
+        query = query.filter(models.RefreshToken.user_id == user_id)
+    return query.delete(synchronize_session=False)
+
+
+def issue_refresh_token(db: Session, user: models.User) -> str:
+    """
+    Add a new refresh token for ``user`` to ``db``, dropping the user's
+    stale ones on the way so the table does not grow with every login and
+    rotation; the caller commits.
+    """
+    purge_refresh_tokens(db, user.id)
+    token = secrets.token_urlsafe(32)
+    db.add(
+        models.RefreshToken(
+            token_hash=_hash_refresh_token(token),
+            user_id=user.id,
+            token_version=user.token_version,
+            expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+    )
+    return token
+
+
+def rotate_refresh_token(
+    db: Session, token: str
+) -> Optional[Tuple[Dict[str, Any], str]]:
+    """
+    Spend ``token`` and issue its successor. Returns the access token claims
+    and the new refresh token, or None if ``token`` is not usable.
+
+    Presenting an already rotated token means it leaked: every live refresh
+    token of that user is revoked, and so are their access tokens.
+    """
+    now = datetime.utcnow()
+    row = (
+        db.query(models.RefreshToken)
+        .filter(models.RefreshToken.token_hash == _hash_refresh_token(token))
+        .first()
+    )
+    if row is None or row.expires_at < now:
+        return None
+
+    live = db.query(models.RefreshToken).filter(models.RefreshToken.revoked_at.is_(None))
+    if row.revoked_at is not None:
+        live.filter(models.RefreshToken.user_id == row.user_id).update(
+            {models.RefreshToken.revoked_at: now}, synchronize_session=False
+        )
+        revoke_tokens(row.user)
+        db.commit()
+        return None
+
+    # Conditional UPDATE so two concurrent refreshes cannot both win
+    claimed = live.filter(models.RefreshToken.id == row.id).update(
+        {models.RefreshToken.revoked_at: now}, synchronize_session=False
+    )
+    user = row.user
+    if claimed != 1 or user.token_version != row.token_version:
+        db.commit()
+        return None
+
+    claims = access_token_claims(user)
+    new_token = issue_refresh_token(db, user)
+    db.commit()
+    return claims, new_token
+
+
 def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
     return db.query(models.User).filter(models.User.email == email).first()
 
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[models.User]:
-    user = get_user_by_email(db, email)
+def get_user_by_id(db: Session, user_id: int) -> Optional[models.User]:
+    return db.get(models.User, user_id)
+
+
+def _store_password_hash(db: Session, user: models.User, hashed_password: str) -> None:
+    # Flushed only: the login that follows commits it together with the new
+    # refresh token, and ``user`` stays loaded for the token claims
+    user.hashed_password = hashed_password
+    db.flush()
+
+
+async def authenticate_user(
+    db: DbSession, email: str, password: str
+) -> Optional[models.User]:
+    user = await run_db(db, get_user_by_email, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    verified, new_hash = await password_hasher.run(
+        verify_and_update_password, password, user.hashed_password
+    )
+    if not verified:
         return None
+    if new_hash is not None:
+        await run_db(db, _store_password_hash, user, new_hash)
     return user
 
 
+async def _resolve_versioned_token(
+    db: DbSession, token_data: schemas.TokenData
+) -> Optional[Principal]:
+    current = token_versions.get(token_data.uid)
+    if token_data.ver > current:
+        # Re-issued after a revocation this process has not loaded yet (or
+        # the user was deleted here): settle it with the user's own row
+        user = await run_db(db, get_user_by_id, token_data.uid)
+        if user is None:
+            return None
+        current = user.token_version
+        token_versions.set(user.id, current)
+
+    if token_data.ver != current:
+        return None
+    return Principal(id=token_data.uid, email=token_data.sub)
+
+
 async def get_current_user(
     request: Request,
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> models.User:
+    db: DbSession = Depends(get_read_session),
+) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials.",
@@ -70,14 +523,44 @@ async def get_current_user(
         sub = payload.get("sub")
         if sub is None:
             raise credentials_exception
-        token_data = schemas.TokenData(sub=sub)
-    except JWTError:
+        token_data = schemas.TokenData(
+            sub=sub, uid=payload.get("uid"), ver=payload.get("ver")
+        )
+    except (JWTError, ValidationError):
         raise credentials_exception
 
-    user = get_user_by_email(db, token_data.sub) if token_data.sub else None
-    if user is None:
+    if not token_data.sub:
         raise credentials_exception
 
+    if token_data.uid is not None and token_data.ver is not None:
+        principal = await _resolve_versioned_token(db, token_data)
+        if principal is None:
+            raise credentials_exception
+        request.state.user_id = principal.id
+        return principal
+
+    # Legacy email-only token: resolve the subject (cached) to a user
+    principal = principal_cache.get(token_data.sub)
+    if principal is None:
+        generation = principal_cache.generation()
+        user = await run_db(db, get_user_by_email, token_data.sub)
+        if user is None:
+            raise credentials_exception
+        principal = Principal(id=user.id, email=user.email)
+        principal_cache.set(token_data.sub, principal, generation)
+
     # expose user id to logging middleware
-    request.state.user_id = user.id
-    return user
+    request.state.user_id = principal.id
+    return principal
+
+
+async def get_admin_user(
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
+    """Allow only users listed in BUDGET_APP_ADMIN_EMAILS."""
+    if current_user.email.lower() not in security_settings.admin_emails:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required.",
+        )
+    return current_user
@@ -0,0 +1,150 @@
+# app/budget_counters.py
+"""
+Denormalized spend counters on Budget (``spent_total``, ``tx_count``).
+
+A transaction counts toward a budget when it is an expense linked to it,
+owned by the budget's user and dated within the budget's period: the same
+rule the status endpoints used to aggregate on every read. Counters are
+adjusted in the flush that changes the transaction, so they commit or roll
+back together with it.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Iterable, List, Mapping, Optional
+
+from sqlalchemy import and_, bindparam, event, func, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from . import models
+from .rollups import iter_transaction_changes
+
+
+def _contribution(values: Optional[Mapping], sign: int) -> Optional[dict]:
+    if values is None or values["type"] != "expense" or values["budget_id"] is None:
+        return None
+    return {
+        "b_id": values["budget_id"],
+        "b_user_id": values["user_id"],
+        "b_date": values["date"],
+        "b_amount": sign * Decimal(values["amount"]),
+        "b_count": sign,
+    }
+
+
+def contributions_for_rows(rows: Iterable[Mapping]) -> List[dict]:
+    """Counter increments for freshly inserted transaction rows."""
+    changes = (_contribution(row, 1) for row in rows)
+    return [change for change in changes if change is not None]
+
+
+def apply_budget_deltas(conn: Connection, changes: List[dict]) -> None:
+    if not changes:
+        return
+
+    table = models.Budget.__table__
+    # The period/owner check lives in the WHERE clause, so contributions
+    # outside the budget simply match no row
+    stmt = (
+        update(table)
+        .where(
+            table.c.id == bindparam("b_id"),
+            table.c.user_id == bindparam("b_user_id"),
+            table.c.start_date <= bindparam("b_date"),
+            table.c.end_date >= bindparam("b_date"),
+        )
+        .values(
+            spent_total=table.c.spent_total + bindparam("b_amount"),
+            tx_count=table.c.tx_count + bindparam("b_count"),
+            # counters changing is not an edit of the budget itself
+            updated_at=table.c.updated_at,
+        )
+    )
+    conn.execute(stmt, changes)
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_budget_counters(session, flush_context):
+    changes = []
+    for old, new in iter_transaction_changes(session):
+        for change in (_contribution(old, -1), _contribution(new, 1)):
+            if change is not None:
+                changes.append(change)
+
+    if changes:
+        apply_budget_deltas(session.connection(), changes)
+
+
+@dataclass
+class CounterMismatch:
+    budget_id: int
+    stored_total: Decimal
+    stored_count: int
+    actual_total: Decimal
+    actual_count: int
+
+
+def check_budget_counters(db: Session, repair: bool = False) -> List[CounterMismatch]:
+    """
+    Compare stored counters with a fresh aggregate over transactions.
+    With ``repair=True`` mismatched budgets are rewritten and committed.
+    """
+    budget, tx = models.Budget, models.Transaction
+    actual = (
+        select(
+            tx.budget_id.label("budget_id"),
+            func.sum(tx.amount).label("total"),
+            func.count().label("count"),
+        )
+        .join(
+            budget,
+            and_(
+                budget.id == tx.budget_id,
+                budget.user_id == tx.user_id,
+                tx.date >= budget.start_date,
+                tx.date <= budget.end_date,
+            ),
+        )
+        .where(tx.type == "expense")
+        .group_by(tx.budget_id)
+        .subquery()
+    )
+    rows = db.execute(
+        select(
+            budget.id,
+            budget.spent_total,
+            budget.tx_count,
+            actual.c.total,
+            actual.c.count,
+        ).outerjoin(actual, actual.c.budget_id == budget.id)
+    ).all()
+
+    mismatches = []
+    for budget_id, stored_total, stored_count, actual_total, actual_count in rows:
+        stored_total = Decimal(stored_total or 0)
+        actual_total = Decimal(actual_total or 0)
+        stored_count = stored_count or 0
+        actual_count = actual_count or 0
+        if stored_total != actual_total or stored_count != actual_count:
+            mismatches.append(
+                CounterMismatch(budget_id, stored_total, stored_count, actual_total, actual_count)
+            )
+
+    if repair and mismatches:
+        table = budget.__table__
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(
+                spent_total=bindparam("b_total"),
+                tx_count=bindparam("b_count"),
+                updated_at=table.c.updated_at,
+            ),
+            [
+                {"b_id": m.budget_id, "b_total": m.actual_total, "b_count": m.actual_count}
+                for m in mismatches
+            ],
+        )
+        db.commit()
+
+    return mismatches
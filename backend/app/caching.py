@@ -0,0 +1,127 @@
+# app/caching.py
+"""
+In-process caches invalidated by database commits.
+
+``GenerationalCache`` is a bounded, TTL'd LRU of values grouped by owner
+(a user id, a token subject). ``InvalidateOnCommit`` collects the owners a
+session touched in ``session.info`` and invalidates them once the session
+commits, or forgets them on rollback, so readers never see a change
+before it is durable.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+V = TypeVar("V")
+
+
+class GenerationalCache(Generic[V]):
+    """
+    Readers take a ``generation()`` before loading a value and hand it to
+    ``set``; a load that started before ``invalidate(owner)`` cannot store
+    its (possibly stale) result afterwards.
+
+    Generations come from one clock. Only the latest ``max_entries``
+    invalidations are remembered per owner; older ones collapse into a
+    floor every owner is checked against, so the bookkeeping stays bounded
+    (at worst an entry older than the floor is loaded again).
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[Hashable, Hashable], Tuple[V, int, float]]" = OrderedDict()
+        self._invalidated: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._clock = 0
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._clock
+
+    def _valid_since(self, owner: Hashable) -> int:
+        return self._invalidated.get(owner, self._floor)
+
+    def get(self, owner: Hashable, key: Hashable = None) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.get((owner, key))
+            if entry is not None:
+                value, generation, expires_at = entry
+                if generation >= self._valid_since(owner) and expires_at >= time.monotonic():
+                    self._entries.move_to_end((owner, key))
+                    self.hits += 1
+                    return value
+                del self._entries[(owner, key)]
+            self.misses += 1
+            return None
+
+    def set(self, owner: Hashable, value: V, generation: int, key: Hashable = None) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation < self._valid_since(owner):
+                return
+            self._entries[(owner, key)] = (
+                value,
+                generation,
+                time.monotonic() + self.ttl_seconds,
+            )
+            self._entries.move_to_end((owner, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, owner: Hashable) -> None:
+        with self._lock:
+            self._clock += 1
+            self._invalidated[owner] = self._clock
+            self._invalidated.move_to_end(owner)
+            while len(self._invalidated) > self.max_entries:
+                _, stamp = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, stamp)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._invalidated.clear()
+            self._clock = 0
+            self._floor = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+class InvalidateOnCommit:
+    """
+    Owners to invalidate in ``cache`` once a session commits. after_flush
+    listeners (or code issuing bulk statements) call ``add``.
+    """
+
+    def __init__(self, cache: GenerationalCache, info_key: str):
+        self.cache = cache
+        self.info_key = info_key
+        event.listen(Session, "after_commit", self._apply)
+        event.listen(Session, "after_rollback", self._discard)
+
+    def add(self, session: Session, owner: Hashable) -> None:
+        session.info.setdefault(self.info_key, set()).add(owner)
+
+    def _apply(self, session: Session) -> None:
+        for owner in session.info.pop(self.info_key, ()):
+            self.cache.invalidate(owner)
+
+    def _discard(self, session: Session) -> None:
+        session.info.pop(self.info_key, None)
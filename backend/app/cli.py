@@ -0,0 +1,110 @@
+# app/cli.py
+"""
+Maintenance commands.
+
+    python -m app.cli rebuild-rollups [--user-id ID]
+    python -m app.cli check-budget-counters [--repair]
+    python -m app.cli purge-refresh-tokens
+    python -m app.cli purge-user-tombstones
+"""
+import argparse
+import sys
+from typing import Optional, Sequence
+
+from .auth import purge_refresh_tokens, purge_user_tombstones
+from .budget_counters import check_budget_counters
+from .db import SessionLocal
+from .rollups import rebuild_daily_rollups
+
+
+def _rebuild_rollups(args: argparse.Namespace) -> int:
+    db = SessionLocal()
+    try:
+        rows = rebuild_daily_rollups(db, user_id=args.user_id)
+    finally:
+        db.close()
+    print(f"daily_rollups rebuilt: {rows} rows")
+    return 0
+
+
+def _check_budget_counters(args: argparse.Namespace) -> int:
+    db = SessionLocal()
+    try:
+        mismatches = check_budget_counters(db, repair=args.repair)
+    finally:
+        db.close()
+
+    for m in mismatches:
+        print(
+            f"budget {m.budget_id}: stored {m.stored_total}/{m.stored_count} "
+            f"actual {m.actual_total}/{m.actual_count}"
+        )
+    if not mismatches:
+        print("budget counters consistent")
+        return 0
+    if args.repair:
+        print(f"repaired {len(mismatches)} budget(s)")
+        return 0
+    return 1
+
+
+def _purge_refresh_tokens(args: argparse.Namespace) -> int:
+    db = SessionLocal()
+    try:
+        deleted = purge_refresh_tokens(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"refresh tokens purged: {deleted} rows")
+    return 0
+
+
+def _purge_user_tombstones(args: argparse.Namespace) -> int:
+    db = SessionLocal()
+    try:
+        deleted = purge_user_tombstones(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"user tombstones purged: {deleted} rows")
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser(
+        "rebuild-rollups",
+        help="Recompute daily_rollups from the transactions table (backfill/repair).",
+    )
+    rebuild.add_argument("--user-id", type=int, default=None)
+    rebuild.set_defaults(handler=_rebuild_rollups)
+
+    check = commands.add_parser(
+        "check-budget-counters",
+        help="Verify Budget.spent_total/tx_count against transactions.",
+    )
+    check.add_argument(
+        "--repair", action="store_true", help="Rewrite mismatched counters."
+    )
+    check.set_defaults(handler=_check_budget_counters)
+
+    purge = commands.add_parser(
+        "purge-refresh-tokens",
+        help="Delete expired and long-revoked refresh tokens.",
+    )
+    purge.set_defaults(handler=_purge_refresh_tokens)
+
+    tombstones = commands.add_parser(
+        "purge-user-tombstones",
+        help="Delete tombstones of users deleted longer ago than the access token lifetime.",
+    )
+    tombstones.set_defaults(handler=_purge_user_tombstones)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
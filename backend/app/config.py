@@ -1,27 +1,199 @@
 import os
+import re
+from typing import Dict, List, Literal, Union
+
 from pydantic import BaseModel, ValidationError
 
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    value = raw.strip().lower()
+    if value in ("1", "true", "yes", "on"):
+        return True
+    if value in ("0", "false", "no", "off"):
+        return False
+    raise RuntimeError(f"{name} must be a boolean (true/false).")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError as exc:
+        raise RuntimeError(f"{name} must be an integer.") from exc
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError as exc:
+        raise RuntimeError(f"{name} must be a number.") from exc
+
+
 class SecuritySettings(BaseModel):
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60
+    refresh_token_expire_days: int = 30
+    # In-process cache of authenticated principals (0 disables it)
+    user_cache_ttl_seconds: float = 60.0
+    user_cache_max_entries: int = 10_000
+    # How often a background thread reloads the token version denylist
+    # from the DB (0 disables reloads)
+    token_version_refresh_seconds: float = 30.0
+    # pbkdf2 cost; stored hashes with a different cost are rehashed on login
+    password_hash_rounds: int = 29_000
+    # Dedicated hashing pool: worker threads + jobs allowed to wait for one
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 32
+    # Users allowed to call /admin endpoints
+    admin_emails: List[str] = []
 
 def load_security_settings() -> SecuritySettings:
     try:
-        return SecuritySettings(
-            secret_key=os.environ["BUDGET_APP_SECRET_KEY"],
-            algorithm=os.getenv("BUDGET_APP_ALGORITHM", "HS256"),
-            access_token_expire_minutes=int(
-                os.getenv("BUDGET_APP_ACCESS_TOKEN_EXPIRE_MINUTES", "60")
-            ),
-        )
+        secret_key = os.environ["BUDGET_APP_SECRET_KEY"]
     except KeyError as exc:
         raise RuntimeError(
             "BUDGET_APP_SECRET_KEY must be set in the environment for token signing."
         ) from exc
-    except ValueError as exc:
+
+    return SecuritySettings(
+        secret_key=secret_key,
+        algorithm=os.getenv("BUDGET_APP_ALGORITHM", "HS256"),
+        access_token_expire_minutes=_env_int(
+            "BUDGET_APP_ACCESS_TOKEN_EXPIRE_MINUTES", 60
+        ),
+        refresh_token_expire_days=_env_int("BUDGET_APP_REFRESH_TOKEN_EXPIRE_DAYS", 30),
+        user_cache_ttl_seconds=_env_float("BUDGET_APP_USER_CACHE_TTL_SECONDS", 60.0),
+        user_cache_max_entries=_env_int("BUDGET_APP_USER_CACHE_MAX_ENTRIES", 10_000),
+        token_version_refresh_seconds=_env_float(
+            "BUDGET_APP_TOKEN_VERSION_REFRESH_SECONDS", 30.0
+        ),
+        password_hash_rounds=_env_int("BUDGET_APP_PASSWORD_HASH_ROUNDS", 29_000),
+        password_hash_workers=_env_int("BUDGET_APP_PASSWORD_HASH_WORKERS", 2),
+        password_hash_max_pending=_env_int("BUDGET_APP_PASSWORD_HASH_MAX_PENDING", 32),
+        admin_emails=[
+            email.strip().lower()
+            for email in os.getenv("BUDGET_APP_ADMIN_EMAILS", "").split(",")
+            if email.strip()
+        ],
+    )
+
+security_settings = load_security_settings()
+
+
+# PRAGMAs applied to every new SQLite connection, per profile. "production"
+# switches to WAL so readers no longer block on the writer's commit.
+SQLITE_PROFILES: Dict[str, Dict[str, Union[str, int]]] = {
+    "default": {},
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,  # negative = KiB, i.e. 64 MiB per connection
+        "mmap_size": 268435456,  # 256 MiB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,  # ms
+    },
+}
+
+SQLITE_PRAGMAS = (
+    "journal_mode",
+    "synchronous",
+    "cache_size",
+    "mmap_size",
+    "temp_store",
+    "busy_timeout",
+)
+
+_PRAGMA_VALUE_RE = re.compile(r"^-?[A-Za-z0-9_]+$")
+
+
+class DatabaseSettings(BaseModel):
+    url: str = "sqlite:///./budget.db"
+    # Serve requests through AsyncEngine/AsyncSession instead of the threadpool
+    use_async: bool = False
+    profile: Literal["default", "production"] = "default"
+    sqlite_pragmas: Dict[str, Union[str, int]] = {}
+    # Single-writer engine + pooled read-only engine for GET handlers
+    split_read_pool: bool = False
+    read_pool_size: int = 5
+    # Statements slower than this are recorded with their plan (0 disables)
+    slow_query_ms: float = 200.0
+    slow_query_log_size: int = 100
+
+    @property
+    def async_url(self) -> str:
+        if self.url.startswith("sqlite:"):
+            return "sqlite+aiosqlite:" + self.url[len("sqlite:"):]
+        return self.url
+
+def load_database_settings() -> DatabaseSettings:
+    profile = os.getenv("BUDGET_APP_DB_PROFILE", "default")
+    if profile not in SQLITE_PROFILES:
         raise RuntimeError(
-            "BUDGET_APP_ACCESS_TOKEN_EXPIRE_MINUTES must be an integer."
-        ) from exc
+            f"BUDGET_APP_DB_PROFILE must be one of: {', '.join(SQLITE_PROFILES)}."
+        )
+
+    pragmas = dict(SQLITE_PROFILES[profile])
+    for name in SQLITE_PRAGMAS:
+        env_name = f"BUDGET_APP_SQLITE_{name.upper()}"
+        value = os.getenv(env_name)
+        if value is None:
+            continue
+        if not _PRAGMA_VALUE_RE.match(value):
+            raise RuntimeError(f"{env_name} has an invalid value.")
+        pragmas[name] = value
+
+    return DatabaseSettings(
+        url=os.getenv("BUDGET_APP_DATABASE_URL", "sqlite:///./budget.db"),
+        use_async=_env_bool("BUDGET_APP_DB_ASYNC", False),
+        profile=profile,
+        sqlite_pragmas=pragmas,
+        split_read_pool=_env_bool(
+            "BUDGET_APP_DB_SPLIT_READ_POOL", profile == "production"
+        ),
+        read_pool_size=_env_int("BUDGET_APP_DB_READ_POOL_SIZE", 5),
+        slow_query_ms=_env_float("BUDGET_APP_SLOW_QUERY_MS", 200.0),
+        slow_query_log_size=_env_int("BUDGET_APP_SLOW_QUERY_LOG_SIZE", 100),
+    )
+
+database_settings = load_database_settings()
+
+
+LOG_OVERFLOW_POLICIES = ("block", "drop", "count")
+
+
+class LoggingSettings(BaseModel):
+    # Records buffered between the request path and the stdout writer thread;
+    # 0 writes synchronously from the logging call as before
+    queue_size: int = 10_000
+    # What a full queue does: wait for the writer, drop silently, or drop and
+    # periodically log how many records were lost
+    overflow: Literal["block", "drop", "count"] = "count"
+    # Fraction of successful app.request logs kept; audit logs are never sampled
+    request_sample_rate: float = 1.0
+    # Per-request SQL stats: Server-Timing header, and every statement in the
+    # request log when sql_debug is on
+    server_timing: bool = True
+    sql_debug: bool = False
+
+def load_logging_settings() -> LoggingSettings:
+    overflow = os.getenv("BUDGET_APP_LOG_OVERFLOW", "count")
+    if overflow not in LOG_OVERFLOW_POLICIES:
+        raise RuntimeError(
+            f"BUDGET_APP_LOG_OVERFLOW must be one of: {', '.join(LOG_OVERFLOW_POLICIES)}."
+        )
+
+    request_sample_rate = _env_float("BUDGET_APP_REQUEST_LOG_SAMPLE_RATE", 1.0)
+    if not 0.0 <= request_sample_rate <= 1.0:
+        raise RuntimeError("BUDGET_APP_REQUEST_LOG_SAMPLE_RATE must be between 0 and 1.")
+
+    return LoggingSettings(
+        queue_size=_env_int("BUDGET_APP_LOG_QUEUE_SIZE", 10_000),
+        overflow=overflow,
+        request_sample_rate=request_sample_rate,
+        server_timing=_env_bool("BUDGET_APP_SERVER_TIMING", True),
+        sql_debug=_env_bool("BUDGET_APP_SQL_DEBUG", False),
+    )
 
-security_settings = load_security_settings()
\ No newline at end of file
+logging_settings = load_logging_settings()
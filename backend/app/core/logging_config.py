@@ -1,56 +1,198 @@
 # app/core/logging_config.py
+import atexit
+import copy
 import json
 import logging
+import queue
+import random
 import sys
 from logging.config import dictConfig
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used instead
+    orjson = None
+
+from app.config import LoggingSettings, logging_settings
+
+
+# Attributes every LogRecord has; anything else was passed via ``extra``
+_STANDARD_ATTRS = frozenset(
+    {
+        "name",
+        "msg",
+        "args",
+        "levelname",
+        "levelno",
+        "pathname",
+        "filename",
+        "module",
+        "exc_info",
+        "exc_text",
+        "stack_info",
+        "lineno",
+        "funcName",
+        "created",
+        "msecs",
+        "relativeCreated",
+        "thread",
+        "threadName",
+        "processName",
+        "process",
+    }
+)
+
+
+def _dumps_stdlib(log_record: Dict[str, Any]) -> str:
+    return json.dumps(log_record, default=str)
+
+
+if orjson is not None:
+    # Datetimes go through default=str like the stdlib path; orjson would
+    # otherwise render them in ISO format
+    _ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME
+
+    def _dumps(log_record: Dict[str, Any]) -> str:
+        try:
+            return orjson.dumps(log_record, default=str, option=_ORJSON_OPTIONS).decode()
+        except TypeError:
+            # e.g. ints beyond 64 bits or non-str keys
+            return _dumps_stdlib(log_record)
+
+else:
+    _dumps = _dumps_stdlib
 
 
 class JsonFormatter(logging.Formatter):
-    """Minimal JSON formatter for production-friendly logs."""
+    """
+    Minimal JSON formatter for production-friendly logs.
+
+    Serializes with orjson when it is installed (compact separators, same
+    fields) and with the stdlib json module otherwise.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        # (logger name, level) -> leading fields, shared by every record
+        self._static_fields: Dict[Tuple[str, str], Dict[str, Any]] = {}
 
     def format(self, record: logging.LogRecord) -> str:
-        log_record = {
-            "level": record.levelname,
-            "logger": record.name,
-            "message": record.getMessage(),
-        }
+        static_key = (record.name, record.levelname)
+        static = self._static_fields.get(static_key)
+        if static is None:
+            static = {"level": record.levelname, "logger": record.name}
+            self._static_fields[static_key] = static
 
-        # Include extra attributes (those not part of the standard LogRecord)
-        standard_attrs = {
-            "name",
-            "msg",
-            "args",
-            "levelname",
-            "levelno",
-            "pathname",
-            "filename",
-            "module",
-            "exc_info",
-            "exc_text",
-            "stack_info",
-            "lineno",
-            "funcName",
-            "created",
-            "msecs",
-            "relativeCreated",
-            "thread",
-            "threadName",
-            "processName",
-            "process",
-        }
+        log_record = dict(static)
+        log_record["message"] = record.getMessage()
 
+        # Include extra attributes (those not part of the standard LogRecord)
         for key, value in record.__dict__.items():
-            if key in standard_attrs:
-                continue
-            if key.startswith("_"):
+            if key in _STANDARD_ATTRS or key[0] == "_":
                 continue
             log_record[key] = value
 
-        return json.dumps(log_record, default=str)
+        return _dumps(log_record)
+
+
+class RequestLogSampler(logging.Filter):
+    """
+    Keeps a ``rate`` fraction of successful (status < 400) request logs.
+    Errors and records without a status code always pass.
+    """
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1.0:
+            return True
+        status_code = getattr(record, "status_code", None)
+        if status_code is None or status_code >= 400:
+            return True
+        return random.random() < self.rate
+
 
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler for a bounded queue with an explicit overflow policy:
+    "block" waits for the listener, "drop" discards the record, "count"
+    discards it and later logs how many records were lost.
+    """
+
+    def __init__(self, queue: queue.Queue, overflow: str = "count"):
+        super().__init__(queue)
+        self.overflow = overflow
+        self.dropped = 0
+        self._unreported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args now (they may change after the call returns) but leave
+        # formatting to the listener's JsonFormatter, so output is unchanged
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # Called under self.lock (Handler.handle), so the counters are safe
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        if self._unreported:
+            self._report_dropped()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            if self.overflow == "count":
+                self._unreported += 1
+
+    def _report_dropped(self) -> None:
+        report = logging.LogRecord(
+            "app.logging", logging.WARNING, __file__, 0, "log_records_dropped", None, None
+        )
+        report.dropped = self._unreported
+        try:
+            self.queue.put_nowait(report)
+        except queue.Full:
+            return
+        self._unreported = 0
+
+
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging(settings: LoggingSettings = logging_settings) -> None:
+    """
+    Configure application-wide logging in JSON to stdout.
+
+    With a queue (the default), loggers only enqueue records and a
+    background QueueListener does the actual stdout writes, so a slow
+    consumer of stdout no longer stalls request handling.
+    """
+    global _listener
+    shutdown_logging()
+
+    console = {
+        "class": "logging.StreamHandler",
+        "stream": sys.stdout,
+        "formatter": "json",
+    }
+    if settings.queue_size > 0:
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JsonFormatter())
+        log_queue: queue.Queue = queue.Queue(maxsize=settings.queue_size)
+        _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        console = {
+            "()": BoundedQueueHandler,
+            "queue": log_queue,
+            "overflow": settings.overflow,
+        }
 
-def configure_logging() -> None:
-    """Configure application-wide logging in JSON to stdout."""
     dictConfig(
         {
             "version": 1,
@@ -61,11 +203,7 @@ def configure_logging() -> None:
                 }
             },
             "handlers": {
-                "console": {
-                    "class": "logging.StreamHandler",
-                    "stream": sys.stdout,
-                    "formatter": "json",
-                }
+                "console": console,
             },
             "loggers": {
                 # Uvicorn loggers (if running under uvicorn)
@@ -90,7 +228,7 @@ def configure_logging() -> None:
                     "level": "INFO",
                     "propagate": False,
                 },
-                # Audit logger (for important actions)
+                # Audit logger (for important actions, never sampled)
                 "audit": {
                     "handlers": ["console"],
                     "level": "INFO",
@@ -103,3 +241,51 @@ def configure_logging() -> None:
             },
         }
     )
+
+    # Per-request logs; successes may be sampled, errors never are. Set up by
+    # hand because dictConfig appends logger filters instead of replacing them.
+    request_logger = logging.getLogger("app.request")
+    for existing in [f for f in request_logger.filters if isinstance(f, RequestLogSampler)]:
+        request_logger.removeFilter(existing)
+    if settings.request_sample_rate < 1.0:
+        request_logger.addFilter(RequestLogSampler(settings.request_sample_rate))
+
+    if _listener is not None:
+        _listener.start()
+
+
+def _swap_queue_handlers(replacements: Tuple[logging.Handler, ...]) -> None:
+    """Put ``replacements`` in place of every BoundedQueueHandler."""
+    loggers = [logging.getLogger()] + [
+        logger
+        for logger in list(logging.Logger.manager.loggerDict.values())
+        if isinstance(logger, logging.Logger)
+    ]
+    for logger in loggers:
+        queued = [h for h in logger.handlers if isinstance(h, BoundedQueueHandler)]
+        if not queued:
+            continue
+        for handler in queued:
+            logger.removeHandler(handler)
+            handler.close()
+        for handler in replacements:
+            logger.addHandler(handler)
+
+
+def shutdown_logging() -> None:
+    """
+    Route logging straight to stdout again, then stop the queue listener
+    once it has written every queued record.
+
+    Loggers keep working after shutdown (uvicorn logs past the app's
+    lifespan); nothing is left enqueued where no thread drains it, or
+    blocks on it with ``overflow=block``.
+    """
+    global _listener
+    if _listener is not None:
+        _swap_queue_handlers(_listener.handlers)
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
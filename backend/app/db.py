@@ -1,14 +1,61 @@
-from sqlalchemy import create_engine
+from typing import Mapping, Union
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import StaticPool
 
+from .config import database_settings
+from .slow_queries import slow_query_log
+
 # Use SQLite by default (good for dev + tests)
-DATABASE_URL = "sqlite:///./budget.db"
+DATABASE_URL = database_settings.url
+
+
+def install_sqlite_pragmas(
+    engine: Engine,
+    pragmas: Mapping[str, Union[str, int]],
+    read_only: bool = False,
+) -> None:
+    """Apply PRAGMAs to every new DBAPI connection the engine opens."""
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            if read_only:
+                cursor.execute("PRAGMA query_only=ON")
+        finally:
+            cursor.close()
+
+
+_split = database_settings.split_read_pool
+# With a split pool all writes funnel through one connection; SQLite only
+# allows one writer anyway, so this queues in the pool instead of on the lock.
+_writer_pool_args = {"pool_size": 1, "max_overflow": 0} if _split else {}
+_reader_pool_args = {"pool_size": database_settings.read_pool_size}
 
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False},
+    **_writer_pool_args,
 )
+install_sqlite_pragmas(engine, database_settings.sqlite_pragmas)
+
+if _split:
+    read_engine = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        **_reader_pool_args,
+    )
+    install_sqlite_pragmas(
+        read_engine, database_settings.sqlite_pragmas, read_only=True
+    )
+else:
+    read_engine = engine
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -16,6 +63,44 @@ SessionLocal = sessionmaker(
     bind=engine,
 )
 
+ReadSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=read_engine,
+)
+
+# Async path (aiosqlite). Objects stay loaded after commit so that response
+# serialization never needs to go back to the database outside a greenlet.
+async_engine = create_async_engine(database_settings.async_url, **_writer_pool_args)
+install_sqlite_pragmas(async_engine.sync_engine, database_settings.sqlite_pragmas)
+
+if _split:
+    async_read_engine = create_async_engine(
+        database_settings.async_url, **_reader_pool_args
+    )
+    install_sqlite_pragmas(
+        async_read_engine.sync_engine,
+        database_settings.sqlite_pragmas,
+        read_only=True,
+    )
+else:
+    async_read_engine = async_engine
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=async_read_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+for _engine in {engine, read_engine, async_engine.sync_engine, async_read_engine.sync_engine}:
+    slow_query_log.install(_engine)
+
 Base = declarative_base()
 
 
@@ -25,3 +110,21 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -0,0 +1,39 @@
+# app/deps.py
+from typing import Any, Callable, TypeVar, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from .config import database_settings
+from .db import get_async_db, get_async_read_db, get_db, get_read_db
+
+T = TypeVar("T")
+
+DbSession = Union[Session, AsyncSession]
+
+# Session dependency used by every router; BUDGET_APP_DB_ASYNC picks the engine.
+get_session = get_async_db if database_settings.use_async else get_db
+
+# Session for read-only GET handlers. Without a split read pool this is the
+# same dependency as get_session, so FastAPI hands both the same session.
+if database_settings.split_read_pool:
+    get_read_session = (
+        get_async_read_db if database_settings.use_async else get_read_db
+    )
+else:
+    get_read_session = get_session
+
+
+async def run_db(db: DbSession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run ``fn(session, *args, **kwargs)`` against whichever session the request got.
+
+    Query code is written once against a sync ``Session``. On the async path it
+    runs inside ``AsyncSession.run_sync`` (greenlet, no worker thread held while
+    waiting on I/O); on the sync path it runs in Starlette's threadpool exactly
+    like a plain ``def`` route would.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
@@ -1,33 +1,60 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import logging
-from app.core.logging_config import configure_logging
+from app.core.logging_config import configure_logging, shutdown_logging
+from app.middleware.metrics import MetricsMiddleware
 from app.middleware.request_logging import RequestLoggingMiddleware
 
 
 from . import schemas
+from .metrics import registry
 
-from .routers import transactions, categories, reports, budgets, auth
+from .auth import password_hasher, token_versions
+from .db import ReadSessionLocal
+from .routers import transactions, categories, reports, budgets, auth, admin
 
 configure_logging()
 
-app = FastAPI(title="Budet App API", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    token_versions.start(ReadSessionLocal)
+    yield
+    token_versions.stop()
+    password_hasher.shutdown()
+    # Last, so records logged during shutdown still reach stdout
+    shutdown_logging()
+
+
+app = FastAPI(title="Budet App API", version="0.1.0", lifespan=lifespan)
 
 logger = logging.getLogger("app.request")
 
 app.add_middleware(RequestLoggingMiddleware)
+# Added last = outermost, so its timing also covers request logging
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/health")
 async def health():
     return {"status": "ok"}
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of the in-process metrics registry."""
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
 app.include_router(transactions.router)
 app.include_router(categories.router)
 app.include_router(reports.router)
 app.include_router(budgets.router)
 app.include_router(auth.router)
+app.include_router(admin.router)
 
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
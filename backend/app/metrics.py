@@ -0,0 +1,276 @@
+# app/metrics.py
+"""
+In-process metrics registry rendered in the Prometheus text format.
+
+Deliberately small: counters, gauges and fixed-bucket histograms with
+labels, all guarded by one lock per metric. Values only live in this
+process; scrape every worker.
+"""
+import math
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import anyio.to_thread
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; tuned for API latencies (5 ms .. 10 s)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Sequence[str]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(label) for label in labels)
+
+    @abstractmethod
+    def samples(self) -> Iterable[str]:
+        """Exposition lines for this metric, without HELP/TYPE."""
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+            *self.samples(),
+        ]
+
+
+class Counter(_Metric):
+    """
+    A monotonically increasing counter. Pass ``callback`` to read a count
+    kept elsewhere at scrape time instead (unlabelled only).
+    """
+
+    type_name = "counter"
+
+    def __init__(self, *args, callback: Optional[Callable[[], float]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        if self._callback is not None:
+            return self._callback()
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[str]:
+        if self._callback is not None:
+            yield f"{self.name} {_format_value(self._callback())}"
+            return
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """
+    A settable gauge. Pass ``callback`` for gauges read at scrape time
+    instead (unlabelled only).
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, *args, callback: Optional[Callable[[], float]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, *labels: str) -> float:
+        if self._callback is not None:
+            return self._callback()
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[str]:
+        if self._callback is not None:
+            yield f"{self.name} {_format_value(self._callback())}"
+            return
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [count per bucket..., +Inf count], sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = ([0] * (len(self.buckets) + 1), [0.0])
+                self._values[key] = entry
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def count(self, *labels: str) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return sum(entry[0]) if entry else 0
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(
+                (key, (list(counts), total[0])) for key, (counts, total) in self._values.items()
+            )
+        names = self.labelnames + ("le",)
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                labels = _format_labels(names, (*key, _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered.")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], float]] = None,
+    ) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, callback=callback))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], float]] = None,
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback=callback))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the response start, by route template.",
+    ("method", "route"),
+)
+REQUESTS_TOTAL = registry.counter(
+    "http_requests_total",
+    "Completed HTTP requests by route template and status code.",
+    ("method", "route", "status"),
+)
+REQUESTS_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled.",
+)
+
+
+# Scrape-time view of the threadpool that sync work (run_in_threadpool,
+# sync session access via run_db) shares. Read from the /metrics handler,
+# i.e. inside the event loop, which anyio requires.
+def _thread_limiter():
+    return anyio.to_thread.current_default_thread_limiter()
+
+
+registry.gauge(
+    "threadpool_workers_max",
+    "Capacity of the shared worker threadpool.",
+    callback=lambda: _thread_limiter().total_tokens,
+)
+registry.gauge(
+    "threadpool_workers_busy",
+    "Worker threads currently running sync work.",
+    callback=lambda: _thread_limiter().borrowed_tokens,
+)
+registry.gauge(
+    "threadpool_tasks_waiting",
+    "Tasks queued for a worker thread; non-zero means the pool is saturated.",
+    callback=lambda: _thread_limiter().statistics().tasks_waiting,
+)
@@ -0,0 +1,49 @@
+# app/middleware/metrics.py
+from time import perf_counter
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT, REQUESTS_TOTAL
+
+# Label for requests that matched no route (404s, probes), so arbitrary
+# paths cannot blow up the label set
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status and in-flight metrics for every HTTP request,
+    labelled by route template (``scope["route"]``) rather than raw path.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter()
+        status_code = 500
+        elapsed = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, elapsed
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed = perf_counter() - start
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            template = getattr(route, "path", None) or UNMATCHED_ROUTE
+            method = scope["method"]
+            if elapsed is None:
+                elapsed = perf_counter() - start
+            REQUEST_LATENCY.observe(elapsed, method, template)
+            REQUESTS_TOTAL.inc(method, template, str(status_code))
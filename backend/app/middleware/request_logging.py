@@ -2,53 +2,99 @@
 import logging
 from time import perf_counter
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from app.config import logging_settings
+from app.query_stats import track_queries
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
+AUDITED_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+AUDITED_PATH_PREFIXES = (
+    "/transactions",
+    "/budgets",
+    "/categories",
+    "/auth/login",
+    "/auth/register",
+)
+
+
+class RequestLoggingMiddleware:
     """
     Logs every request in a structured way and emits coarse audit logs for
     write operations (POST/PUT/PATCH/DELETE) on key resources.
+
+    Plain ASGI middleware: the status code and timing are taken from the
+    ``http.response.start`` message as it passes through ``send``, so the
+    response body (e.g. the streamed CSV export) is never wrapped or buffered.
+
+    SQL run on behalf of the request is summarised in the log record and,
+    for statements issued before the response starts, in a ``Server-Timing``
+    header.
     """
 
-    def __init__(self, app):
-        super().__init__(app)
+    def __init__(
+        self,
+        app: ASGIApp,
+        server_timing: bool = logging_settings.server_timing,
+        sql_debug: bool = logging_settings.sql_debug,
+    ):
+        self.app = app
+        self.server_timing = server_timing
+        self.sql_debug = sql_debug
         self.logger = logging.getLogger("app.request")
         self.audit_logger = logging.getLogger("audit")
 
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Shared with request.state so handlers can expose user_id to us
+        state = scope.setdefault("state", {})
         start = perf_counter()
+        status_code = None
+        process_time_ms = 0.0
+
+        with track_queries(debug=self.sql_debug) as query_stats:
 
-        response: Response = await call_next(request)
+            async def send_wrapper(message: Message) -> None:
+                nonlocal status_code, process_time_ms
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    process_time_ms = (perf_counter() - start) * 1000.0
+                    if self.server_timing:
+                        headers = MutableHeaders(scope=message)
+                        headers.append("Server-Timing", query_stats.server_timing())
+                await send(message)
 
-        process_time_ms = (perf_counter() - start) * 1000.0
-        user_id = getattr(request.state, "user_id", None)
+            # Like the previous BaseHTTPMiddleware version, an exception escaping
+            # the app is left to the outer error middleware and not logged here.
+            await self.app(scope, receive, send_wrapper)
+
+        method = scope["method"]
+        path = scope["path"]
+        user_id = state.get("user_id")
 
         # General request log
         self.logger.info(
             "request_completed",
             extra={
-                "method": request.method,
-                "path": request.url.path,
-                "status_code": response.status_code,
+                "method": method,
+                "path": path,
+                "status_code": status_code,
                 "process_time_ms": round(process_time_ms, 2),
                 "user_id": user_id,
+                **query_stats.log_fields(),
             },
         )
 
         # Coarse audit log for write operations on key resources
-        if request.method in ("POST", "PUT", "PATCH", "DELETE") and request.url.path.startswith(
-            ("/transactions", "/budgets", "/categories", "/auth/login", "/auth/register")
-        ):
+        if method in AUDITED_METHODS and path.startswith(AUDITED_PATH_PREFIXES):
             self.audit_logger.info(
                 "audit_event",
                 extra={
-                    "action": f"{request.method} {request.url.path}",
-                    "status_code": response.status_code,
+                    "action": f"{method} {path}",
+                    "status_code": status_code,
                     "user_id": user_id,
                 },
             )
-
-        return response
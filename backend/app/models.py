@@ -1,20 +1,53 @@
+from decimal import ROUND_HALF_UP, Decimal
+
 from sqlalchemy import (
     Column, 
     Integer,
     String,
-    Numeric,
     Date,
     DateTime,
     ForeignKey,
+    Index,
     func,
 )
 from sqlalchemy.orm import relationship
+from sqlalchemy.types import TypeDecorator
 
 from .db import Base
 
 
+class Money(TypeDecorator):
+    """
+    Decimal amount stored as an integer number of cents.
+
+    SUMs in reports, rollups and budget counters then run on exact integers
+    in SQLite; values only become Decimal when they cross into Python.
+    """
+
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, Decimal):
+            value = Decimal(str(value))
+        return int((value * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, int):
+            value = Decimal(str(value)).to_integral_value(rounding=ROUND_HALF_UP)
+        return Decimal(value).scaleb(-2)
+
+
 class Category(Base):
     __tablename__ = "categories"
+    __table_args__ = (
+        # list_categories: WHERE user_id = ? ORDER BY name, id
+        Index("ix_categories_user_id_name", "user_id", "name"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), unique=True, index=True, nullable=False)
@@ -32,9 +65,29 @@ class Category(Base):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # list/export: WHERE user_id = ? [AND date range] ORDER BY date, id
+        Index("ix_transactions_user_id_date_id", "user_id", "date", "id"),
+        # Per-type date ranges; amount last so sums are answered from the
+        # index alone (SQLite has no INCLUDE, so it is a trailing key column)
+        Index(
+            "ix_transactions_user_id_type_date_amount",
+            "user_id",
+            "type",
+            "date",
+            "amount",
+        ),
+        # Budget counters: expenses linked to a budget within its period
+        Index("ix_transactions_budget_id_type_date", "budget_id", "type", "date"),
+        # Category deletes/reassignments look transactions up by category
+        Index("ix_transactions_category_id", "category_id"),
+    )
+    # created_at/updated_at come back in the INSERT/UPDATE's RETURNING
+    # clause, so writes need no follow-up SELECT to serialize the row
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
-    amount = Column(Numeric(10,2), nullable=False)
+    amount = Column(Money, nullable=False)
     description = Column(String(255), nullable=True)
     date = Column(Date, nullable=False)
 
@@ -64,13 +117,23 @@ class Transaction(Base):
 
 class Budget(Base):
     __tablename__ = "budgets"
+    __table_args__ = (
+        # list_budgets: WHERE user_id = ? ORDER BY start_date, id
+        Index("ix_budgets_user_id_start_date", "user_id", "start_date"),
+    )
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
-    limit = Column(Numeric(10, 2), nullable=False)
+    limit = Column(Money, nullable=False)
     start_date = Column(Date, nullable=False)
     end_date = Column(Date, nullable=False)
 
+    # Maintained from transaction writes (app/budget_counters.py): sum and
+    # count of linked expense transactions dated within the budget period
+    spent_total = Column(Money, nullable=False, default=0, server_default="0")
+    tx_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     user = relationship("User", back_populates="budgets")
 
@@ -92,12 +155,33 @@ class Budget(Base):
     )
 
 
+class DailyRollup(Base):
+    """
+    Per-day income/expense sums, maintained incrementally from transaction
+    writes (see app/rollups.py) so reports scale with days, not rows.
+    """
+    __tablename__ = "daily_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    # Transaction.category_id, with 0 standing in for "uncategorized" so the
+    # key stays NOT NULL and usable as an upsert conflict target
+    category_key = Column(Integer, primary_key=True)
+    type = Column(String(20), primary_key=True)
+
+    total_amount = Column(Money, nullable=False, default=0)
+    tx_count = Column(Integer, nullable=False, default=0)
+
+
 class User(Base):
     __tablename__ = "users"
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)
+    # Bumped to revoke every access token issued so far (see auth.revoke_tokens)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     created_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
@@ -123,4 +207,44 @@ class User(Base):
         "Budget",
         back_populates="user",
         cascade="all, delete-orphan",
-    )
\ No newline at end of file
+    )
+    refresh_tokens = relationship(
+        "RefreshToken",
+        back_populates="user",
+        cascade="all, delete-orphan",
+    )
+
+
+class RefreshToken(Base):
+    """
+    Single-use refresh tokens for /auth/refresh. Only the SHA-256 digest of
+    the opaque token is stored; every use revokes the row and issues a new one.
+    """
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user = relationship("User", back_populates="refresh_tokens")
+
+    # users.token_version at issue time; a bump revokes refresh tokens too
+    token_version = Column(Integer, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+class UserTombstone(Base):
+    """
+    Ids of deleted users. Written in the deleting transaction so every
+    process's token version table rejects their access tokens on its next
+    reload; only needed until those tokens have expired.
+    """
+    __tablename__ = "user_tombstones"
+
+    user_id = Column(Integer, primary_key=True)
+    deleted_at = Column(DateTime(timezone=True), nullable=False)
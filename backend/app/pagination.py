@@ -0,0 +1,205 @@
+# app/pagination.py
+"""
+Pagination helpers shared by the list endpoints.
+
+Keyset (cursor) pagination: a cursor is the sort key of the last row on a
+page, JSON-encoded and then base64url'd so clients treat it as opaque.
+Resuming from it is an index range seek instead of an OFFSET scan over every
+earlier row.
+
+Totals: ``include_total`` picks how (or whether) the ``total`` field is
+computed, since a separate ``COUNT(*)`` doubles the cost of every page.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Hashable, List, Literal, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import event, func, literal, tuple_
+from sqlalchemy.orm import Query, Session, aliased, joinedload
+
+from . import models
+from .caching import GenerationalCache, InvalidateOnCommit
+
+# exact:  separate COUNT(*) query (historic behaviour)
+# window: COUNT(*) OVER () column on the page query itself
+# cached: per-user/per-filter count cached in-process, dropped on writes
+# none:   no count at all
+TotalMode = Literal["exact", "window", "cached", "none"]
+
+# Shared OpenAPI descriptions for the list endpoints' query parameters
+CURSOR_DESCRIPTION = (
+    "Opaque `next_cursor` from a previous page (keyset pagination). "
+    "Cannot be combined with a non-zero `offset`."
+)
+INCLUDE_TOTAL_DESCRIPTION = (
+    "How to compute `total`: 'exact' (separate COUNT), 'window' (COUNT(*) OVER() "
+    "in the page query), 'cached' (per-filter count cached until the next write) "
+    "or 'none' (skip it)."
+)
+
+COUNT_CACHE_TTL_SECONDS = 30.0
+COUNT_CACHE_MAX_ENTRIES = 10_000
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = [v.isoformat() if isinstance(v, date) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> Tuple[Any, ...]:
+    invalid = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid cursor.",
+    )
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise invalid
+    if not isinstance(payload, list) or len(payload) != len(types):
+        raise invalid
+
+    values = []
+    for value, type_ in zip(payload, types):
+        try:
+            if type_ is date:
+                values.append(date.fromisoformat(value))
+            elif isinstance(value, type_) and not isinstance(value, bool):
+                values.append(value)
+            else:
+                raise invalid
+        except (TypeError, ValueError):
+            raise invalid
+    return tuple(values)
+
+
+def keyset_condition(columns: Sequence[Any], values: Sequence[Any], descending: bool):
+    """Row-value comparison selecting rows strictly after ``values`` in sort order."""
+    key = tuple_(*columns)
+    bound = tuple_(*(literal(v, type_=c.type) for c, v in zip(columns, values)))
+    return key < bound if descending else key > bound
+
+
+# Cached list totals, owned by user id and keyed by filter
+count_cache: GenerationalCache[int] = GenerationalCache(
+    COUNT_CACHE_TTL_SECONDS, COUNT_CACHE_MAX_ENTRIES
+)
+_count_invalidations = InvalidateOnCommit(count_cache, "count_cache_users")
+
+_COUNTED_MODELS = (models.Transaction, models.Budget, models.Category)
+
+
+def invalidate_counts_on_commit(session: Session, user_id: int) -> None:
+    """Drop ``user_id``'s cached totals once ``session`` commits.
+
+    Flushed ORM objects are picked up automatically; statements that bypass
+    the unit of work (bulk INSERT/UPDATE) must call this themselves.
+    """
+    _count_invalidations.add(session, user_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_count_invalidations(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _COUNTED_MODELS) and obj.user_id is not None:
+            invalidate_counts_on_commit(session, obj.user_id)
+
+
+@dataclass
+class Page:
+    items: List[Any]
+    next_cursor: Optional[str]
+    total: Optional[int]
+    total_accuracy: Literal["exact", "estimated", "omitted"]
+
+
+def paginate(
+    query: Query,
+    *,
+    entity: Any,
+    sort_key: Sequence[Any],
+    descending: bool,
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+    cursor_types: Sequence[type],
+    include_total: TotalMode,
+    count_cache_key: Optional[Tuple[int, Hashable]] = None,
+    eager_load: Sequence[str] = (),
+) -> Page:
+    """
+    Fetch one page of ``query`` (already filtered, not yet ordered).
+
+    ``sort_key`` are mapped attributes of ``entity``; they define the order,
+    the keyset seek and the emitted ``next_cursor``. One look-ahead row tells
+    us whether a next page exists. ``eager_load`` names many-to-one
+    relationships of ``entity`` joined into the page query, so serializing
+    the items does not lazy-load them one row at a time.
+    """
+    if cursor is not None and offset:
+        # The cursor already fixes the position; an offset on top would
+        # silently skip rows past it
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either cursor or offset, not both.",
+        )
+    cursor_values = decode_cursor(cursor, cursor_types) if cursor is not None else None
+    total: Optional[int] = None
+    accuracy = "omitted"
+
+    if include_total == "exact":
+        total, accuracy = query.order_by(None).count(), "exact"
+    elif include_total == "cached":
+        user_id, key = count_cache_key
+        total = count_cache.get(user_id, key)
+        if total is not None:
+            accuracy = "estimated"
+        else:
+            generation = count_cache.generation()
+            total, accuracy = query.order_by(None).count(), "exact"
+            count_cache.set(user_id, total, generation, key=key)
+
+    if include_total == "window":
+        # Window over the filtered set *before* the keyset seek so the total
+        # does not shrink as the client pages forward.
+        total_col = func.count().over().label("total_count")
+        inner = query.add_columns(total_col).subquery()
+        page_entity = aliased(entity, inner)
+        page_key = [getattr(page_entity, col.key) for col in sort_key]
+        page_query = query.session.query(page_entity, inner.c.total_count)
+    else:
+        page_entity = entity
+        page_key = list(sort_key)
+        page_query = query
+
+    if eager_load:
+        page_query = page_query.options(
+            *(joinedload(getattr(page_entity, name)) for name in eager_load)
+        )
+    if cursor_values is not None:
+        page_query = page_query.filter(keyset_condition(page_key, cursor_values, descending))
+    page_query = page_query.order_by(
+        *(col.desc() if descending else col.asc() for col in page_key)
+    )
+
+    rows = page_query.offset(offset).limit(limit + 1).all()
+    if include_total == "window":
+        if rows:
+            total, accuracy = rows[0].total_count, "exact"
+        else:
+            # Past the end: no row carried the window column
+            total, accuracy = query.order_by(None).count(), "exact"
+        rows = [row[0] for row in rows]
+
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, col.key) for col in sort_key])
+
+    return Page(items=items, next_cursor=next_cursor, total=total, total_accuracy=accuracy)
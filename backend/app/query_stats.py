@@ -0,0 +1,105 @@
+# app/query_stats.py
+"""
+Per-request SQL statistics.
+
+``before_cursor_execute``/``after_cursor_execute`` listeners on every
+Engine feed whatever ``QueryStats`` is active in the current context.
+Request logging opens one per request (see ``track_queries``); the
+context is copied into threadpool workers and stays put across
+``AsyncSession.run_sync``, so sync and async handlers are both covered.
+Statements executed outside a tracked context cost one ContextVar lookup.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Longest statement text kept for the slowest query / debug listing
+MAX_STATEMENT_CHARS = 500
+
+
+@dataclass
+class QueryStats:
+    debug: bool = False
+    count: int = 0
+    total_seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_statement: Optional[str] = None
+    # (statement, seconds); only filled in debug mode
+    statements: List[Tuple[str, float]] = field(default_factory=list)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        if self.slowest_statement is None or seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement[:MAX_STATEMENT_CHARS]
+        if self.debug:
+            self.statements.append((statement[:MAX_STATEMENT_CHARS], seconds))
+
+    @property
+    def total_ms(self) -> float:
+        return self.total_seconds * 1000.0
+
+    def server_timing(self) -> str:
+        """Value for a ``Server-Timing`` header entry."""
+        return f'db;dur={self.total_ms:.2f};desc="{self.count} queries"'
+
+    def log_fields(self) -> dict:
+        fields = {
+            "db_query_count": self.count,
+            "db_time_ms": round(self.total_ms, 2),
+            "db_slowest_ms": round(self.slowest_seconds * 1000.0, 2),
+            "db_slowest_statement": self.slowest_statement,
+        }
+        if self.debug:
+            fields["db_statements"] = [
+                {"statement": statement, "duration_ms": round(seconds * 1000.0, 2)}
+                for statement, seconds in self.statements
+            ]
+        return fields
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@contextmanager
+def track_queries(debug: bool = False) -> Iterator[QueryStats]:
+    stats = QueryStats(debug=debug)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_stats_start", []).append(perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_stats_start")
+    if not starts:
+        return
+    stats.record(statement, perf_counter() - starts.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_query_timer(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_stats_start"):
+        conn.info["query_stats_start"].pop()
@@ -0,0 +1,176 @@
+# app/rollups.py
+"""
+Incremental maintenance of the ``daily_rollups`` table.
+
+Every flush that creates, changes or deletes a Transaction turns into signed
+(amount, count) deltas per (user_id, date, category_key, type), which are
+upserted in the same database transaction. Writes that bypass the unit of
+work (bulk INSERT) call ``apply_rollup_deltas`` themselves.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, Mapping, Optional, Tuple
+
+from sqlalchemy import delete, event, func, inspect, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from . import models
+
+UNCATEGORIZED = 0
+
+RollupKey = Tuple[int, date, int, str]
+RollupDeltas = Dict[RollupKey, list]
+
+
+def rollup_key(user_id: int, tx_date: date, category_id: Optional[int], tx_type: str) -> RollupKey:
+    return (
+        user_id,
+        tx_date,
+        category_id if category_id is not None else UNCATEGORIZED,
+        tx_type,
+    )
+
+
+def _add(deltas: RollupDeltas, key: RollupKey, amount, count: int) -> None:
+    entry = deltas[key]
+    entry[0] += Decimal(amount)
+    entry[1] += count
+
+
+def new_deltas() -> RollupDeltas:
+    return defaultdict(lambda: [Decimal("0"), 0])
+
+
+def deltas_for_rows(rows: Iterable[Mapping]) -> RollupDeltas:
+    """Deltas for freshly inserted transaction rows (dicts of column values)."""
+    deltas = new_deltas()
+    for row in rows:
+        key = rollup_key(row["user_id"], row["date"], row.get("category_id"), row["type"])
+        _add(deltas, key, row["amount"], 1)
+    return deltas
+
+
+def apply_rollup_deltas(conn: Connection, deltas: RollupDeltas) -> None:
+    changes = [
+        {
+            "user_id": key[0],
+            "date": key[1],
+            "category_key": key[2],
+            "type": key[3],
+            "total_amount": amount,
+            "tx_count": count,
+        }
+        for key, (amount, count) in deltas.items()
+        if amount or count
+    ]
+    if not changes:
+        return
+
+    table = models.DailyRollup.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.date, table.c.category_key, table.c.type],
+        set_={
+            "total_amount": table.c.total_amount + stmt.excluded.total_amount,
+            "tx_count": table.c.tx_count + stmt.excluded.tx_count,
+        },
+    )
+    conn.execute(stmt, changes)
+
+    if any(change["tx_count"] < 0 for change in changes):
+        user_ids = {change["user_id"] for change in changes}
+        conn.execute(
+            delete(table).where(table.c.user_id.in_(user_ids), table.c.tx_count <= 0)
+        )
+
+
+_TRACKED = ("user_id", "date", "category_id", "budget_id", "type", "amount")
+
+
+def _values(tx: models.Transaction, before: bool) -> dict:
+    state = inspect(tx)
+    values = {}
+    for name in _TRACKED:
+        current = getattr(tx, name)
+        if before:
+            history = state.attrs[name].history
+            values[name] = history.deleted[0] if history.deleted else current
+        else:
+            values[name] = current
+    return values
+
+
+def iter_transaction_changes(session: Session) -> Iterator[Tuple[Optional[dict], Optional[dict]]]:
+    """
+    Yield ``(old, new)`` column values for every Transaction in the flush:
+    ``old`` is None for inserts, ``new`` is None for deletes. Must be called
+    from after_flush, while attribute history still describes the flush.
+    """
+    for obj in session.new:
+        if isinstance(obj, models.Transaction):
+            yield None, _values(obj, before=False)
+
+    for obj in session.deleted:
+        if isinstance(obj, models.Transaction):
+            yield _values(obj, before=True), None
+
+    for obj in session.dirty:
+        if isinstance(obj, models.Transaction) and session.is_modified(obj):
+            old, new = _values(obj, before=True), _values(obj, before=False)
+            if old != new:
+                yield old, new
+
+
+def _key(values: dict) -> RollupKey:
+    return rollup_key(values["user_id"], values["date"], values["category_id"], values["type"])
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_daily_rollups(session, flush_context):
+    deltas = new_deltas()
+    for old, new in iter_transaction_changes(session):
+        if old is not None:
+            _add(deltas, _key(old), -Decimal(old["amount"]), -1)
+        if new is not None:
+            _add(deltas, _key(new), new["amount"], 1)
+
+    if deltas:
+        apply_rollup_deltas(session.connection(), deltas)
+
+
+def rebuild_daily_rollups(db: Session, user_id: Optional[int] = None) -> int:
+    """
+    Recompute rollups from the raw transactions table (backfill / repair).
+    Returns the number of rollup rows written.
+    """
+    table = models.DailyRollup.__table__
+    tx = models.Transaction
+
+    clear = delete(table)
+    source = select(
+        tx.user_id,
+        tx.date,
+        func.coalesce(tx.category_id, UNCATEGORIZED),
+        tx.type,
+        func.sum(tx.amount),
+        func.count(),
+    )
+    if user_id is not None:
+        clear = clear.where(table.c.user_id == user_id)
+        source = source.where(tx.user_id == user_id)
+    source = source.group_by(
+        tx.user_id, tx.date, func.coalesce(tx.category_id, UNCATEGORIZED), tx.type
+    )
+
+    db.execute(clear)
+    result = db.execute(
+        insert(table).from_select(
+            ["user_id", "date", "category_key", "type", "total_amount", "tx_count"],
+            source,
+        )
+    )
+    db.commit()
+    return result.rowcount
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends
+
+from .. import schemas
+from ..auth import Principal, get_admin_user
+from ..slow_queries import slow_query_log
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/slow-queries", response_model=schemas.SlowQueryListResponse)
+async def list_slow_queries(
+    current_user: Principal = Depends(get_admin_user),
+):
+    """
+    Most recent statements over BUDGET_APP_SLOW_QUERY_MS, newest first, with
+    their query plan. ``full_scan`` flags plans that scan a whole table.
+    """
+    return schemas.SlowQueryListResponse(
+        threshold_ms=slow_query_log.threshold_ms,
+        items=[
+            schemas.SlowQueryRead.model_validate(entry)
+            for entry in slow_query_log.entries()
+        ],
+    )
@@ -1,5 +1,5 @@
 # backend/app/routers/auth.py
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
@@ -7,47 +7,81 @@ from sqlalchemy.orm import Session
 
 from .. import models, schemas
 from ..auth import (
+    Principal,
+    get_current_user,
     get_password_hash,
     authenticate_user,
+    password_hasher,
     create_access_token,
+    access_token_claims,
+    issue_refresh_token,
+    rotate_refresh_token,
+    revoke_tokens,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
-from ..db import get_db
+from ..deps import DbSession, get_session, run_db
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def _email_taken(db: Session, email: str) -> bool:
+    existing = (
+        db.query(models.User).filter(models.User.email == email).first()
+    )
+    return existing is not None
+
+
+def _create_user(db: Session, email: str, hashed_password: str) -> schemas.UserRead:
+    user = models.User(
+        email=email,
+        hashed_password=hashed_password,
+    )
+    db.add(user)
+    db.flush()
+    result = schemas.UserRead.model_validate(user)
+    db.commit()
+    return result
+
+
 @router.post("/register", response_model=schemas.UserRead, status_code=201)
-def register_user(
+async def register_user(
     user_in: schemas.UserCreate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_session),
 ):
-    existing = (
-        db.query(models.User).filter(models.User.email == user_in.email).first()
-    )
-    if existing:
+    if await run_db(db, _email_taken, user_in.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User with this email already exists.",
         )
 
-    hashed_password = get_password_hash(user_in.password)
-    user = models.User(
-        email=user_in.email,
-        hashed_password=hashed_password,
-    )
-    db.add(user)
+    hashed_password = await password_hasher.run(get_password_hash, user_in.password)
+    return await run_db(db, _create_user, user_in.email, hashed_password)
+
+
+def _issue_refresh_token(db: Session, user: models.User) -> str:
+    token = issue_refresh_token(db, user)
     db.commit()
-    db.refresh(user)
-    return user
+    return token
+
+
+def _token_response(claims: dict, refresh_token: str) -> schemas.Token:
+    access_token = create_access_token(
+        data=claims,
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
+    return schemas.Token(
+        access_token=access_token,
+        token_type="bearer",
+        refresh_token=refresh_token,
+    )
 
 
 @router.post("/login", response_model=schemas.Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_session),
 ):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -55,9 +89,51 @@ def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email},
-        expires_delta=access_token_expires,
-    )
-    return schemas.Token(access_token=access_token, token_type="bearer")
+    claims = access_token_claims(user)
+    refresh_token = await run_db(db, _issue_refresh_token, user)
+    return _token_response(claims, refresh_token)
+
+
+@router.post("/refresh", response_model=schemas.Token)
+async def refresh_access_token(
+    body: schemas.TokenRefresh,
+    db: DbSession = Depends(get_session),
+):
+    """
+    Trade a refresh token for a new access token (and a new refresh token),
+    without paying for password verification again.
+    """
+    rotated = await run_db(db, rotate_refresh_token, body.refresh_token)
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    claims, refresh_token = rotated
+    return _token_response(claims, refresh_token)
+
+
+def _logout(db: Session, user_id: int) -> None:
+    user = db.get(models.User, user_id)
+    if user is None:
+        return
+    revoke_tokens(user)
+    db.query(models.RefreshToken).filter(
+        models.RefreshToken.user_id == user_id,
+        models.RefreshToken.revoked_at.is_(None),
+    ).update({models.RefreshToken.revoked_at: datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    db: DbSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Sign out everywhere: every access and refresh token issued to the
+    caller so far stops working.
+    """
+    await run_db(db, _logout, current_user.id)
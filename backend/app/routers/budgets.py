@@ -1,84 +1,186 @@
+from datetime import date
 from decimal import Decimal
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
-from ..db import get_db
-from ..auth import get_current_user
+from ..pagination import (
+    CURSOR_DESCRIPTION,
+    INCLUDE_TOTAL_DESCRIPTION,
+    Page,
+    TotalMode,
+    paginate,
+)
+from ..deps import DbSession, get_read_session, get_session, run_db
+from ..auth import Principal, get_current_user
 
 router = APIRouter(prefix="/budgets", tags=["budgets"])
 
 
+def _get_user_budget(
+    db: Session, budget_id: int, user_id: int
+) -> Optional[models.Budget]:
+    return (
+        db.query(models.Budget)
+        .filter(
+            models.Budget.id == budget_id,
+            models.Budget.user_id == user_id
+            )
+        .first()
+    )
+
+
+def _create_budget(
+    db: Session, budget_in: schemas.BudgetCreate, user_id: int
+) -> schemas.BudgetRead:
+    budget = models.Budget(
+        **budget_in.model_dump(), user_id=user_id
+    )
+    db.add(budget)
+    db.flush()
+    result = schemas.BudgetRead.model_validate(budget)
+    db.commit()
+    return result
+
+
 @router.post(
     "/",
     response_model=schemas.BudgetRead,
     status_code=status.HTTP_201_CREATED,
 )
-def create_budget(
+async def create_budget(
     budget_in: schemas.BudgetCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: DbSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
 ):
-    budget = models.Budget(
-        **budget_in.model_dump(), user_id=current_user.id
+    return await run_db(db, _create_budget, budget_in, current_user.id)
+
+
+def _page_budgets(
+    db: Session,
+    user_id: int,
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+    include_total: TotalMode,
+) -> Page:
+    query = db.query(models.Budget).filter(
+        models.Budget.user_id == user_id
+    )
+
+    # Sort most recent budgets first; fall back on id
+    return paginate(
+        query,
+        entity=models.Budget,
+        sort_key=(models.Budget.start_date, models.Budget.id),
+        descending=True,
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        cursor_types=(date, int),
+        include_total=include_total,
+        count_cache_key=(user_id, ("budgets",)),
+    )
+
+
+def _list_budgets(
+    db: Session,
+    user_id: int,
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+    include_total: TotalMode,
+) -> schemas.BudgetListResponse:
+    page = _page_budgets(db, user_id, limit, offset, cursor, include_total)
+
+    return schemas.BudgetListResponse(
+        items=page.items,
+        total=page.total,
+        total_accuracy=page.total_accuracy,
+        limit=limit,
+        offset=offset,
+        next_cursor=page.next_cursor,
     )
-    db.add(budget)
-    db.commit()
-    db.refresh(budget)
-    return budget
 
 
 @router.get("/", response_model=schemas.BudgetListResponse)
-def list_budgets(
+async def list_budgets(
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    include_total: TotalMode = Query("exact", description=INCLUDE_TOTAL_DESCRIPTION),
+    db: DbSession = Depends(get_read_session),
+    current_user: Principal = Depends(get_current_user),
 ):
-    query = db.query(models.Budget).filter(
-        models.Budget.user_id == current_user.id
+    return await run_db(
+        db, _list_budgets, current_user.id, limit, offset, cursor, include_total
     )
 
-    total = query.count()
 
-    # Sort most recent budgets first; fall back on id
-    items = (
-        query.order_by(
-            models.Budget.start_date.desc(), 
-            models.Budget.id.desc(),
-        )
-        .offset(offset)
-        .limit(limit)
-        .all()
+
+
+def _budget_status(budget: models.Budget) -> schemas.BudgetStatus:
+    # spent_total is kept current by app/budget_counters.py on every
+    # transaction write, so no aggregate over transactions is needed here
+    total_expense = Decimal(budget.spent_total or 0)
+    remaining = Decimal(budget.limit) - total_expense
+    exceeded = remaining < 0
+
+    return schemas.BudgetStatus(
+        budget=budget,
+        total_expense=total_expense,
+        tx_count=budget.tx_count or 0,
+        remaining=remaining,
+        exceeded=exceeded,
     )
 
-    return schemas.BudgetListResponse(
-        items=items,
-        total=total,
+
+def _list_budget_statuses(
+    db: Session,
+    user_id: int,
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+    include_total: TotalMode,
+) -> schemas.BudgetStatusListResponse:
+    page = _page_budgets(db, user_id, limit, offset, cursor, include_total)
+
+    return schemas.BudgetStatusListResponse(
+        items=[_budget_status(budget) for budget in page.items],
+        total=page.total,
+        total_accuracy=page.total_accuracy,
         limit=limit,
         offset=offset,
+        next_cursor=page.next_cursor,
     )
 
 
-
-
-@router.get("/{budget_id}", response_model=schemas.BudgetRead)
-def get_budget(
-    budget_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+# Declared before /{budget_id} so "status" is not parsed as an id
+@router.get("/status", response_model=schemas.BudgetStatusListResponse)
+async def list_budget_statuses(
+    limit: int = Query(50, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    include_total: TotalMode = Query("exact", description=INCLUDE_TOTAL_DESCRIPTION),
+    db: DbSession = Depends(get_read_session),
+    current_user: Principal = Depends(get_current_user),
 ):
-    budget = (
-        db.query(models.Budget)
-        .filter(
-            models.Budget.id == budget_id,
-            models.Budget.user_id == current_user.id
-            )
-        .first()
+    """Status of every budget of the user, paginated like GET /budgets."""
+    return await run_db(
+        db,
+        _list_budget_statuses,
+        current_user.id,
+        limit,
+        offset,
+        cursor,
+        include_total,
     )
+
+
+def _get_budget(db: Session, budget_id: int, user_id: int) -> models.Budget:
+    budget = _get_user_budget(db, budget_id, user_id)
     if budget is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -87,44 +189,32 @@ def get_budget(
     return budget
 
 
-@router.get("/{budget_id}/status", response_model=schemas.BudgetStatus)
-def get_budget_status(
+@router.get("/{budget_id}", response_model=schemas.BudgetRead)
+async def get_budget(
     budget_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: DbSession = Depends(get_read_session),
+    current_user: Principal = Depends(get_current_user)
 ):
-    budget = (
-        db.query(models.Budget)
-        .filter(
-            models.Budget.id == budget_id,
-            models.Budget.user_id == current_user.id
-            )
-        .first()
-    )
+    return await run_db(db, _get_budget, budget_id, current_user.id)
+
+
+def _get_budget_status(
+    db: Session, budget_id: int, user_id: int
+) -> schemas.BudgetStatus:
+    budget = _get_user_budget(db, budget_id, user_id)
     if budget is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Budget not found.",
         )
 
-    # Sum of expense transactions within the budget period and linked to this budget
-    total_expense_raw = (
-        db.query(func.sum(models.Transaction.amount))
-        .filter(models.Transaction.type == "expense")
-        .filter(models.Transaction.budget_id == budget_id)
-        .filter(models.Transaction.user_id == current_user.id)
-        .filter(models.Transaction.date >= budget.start_date)
-        .filter(models.Transaction.date <= budget.end_date)
-        .scalar()
-    )
+    return _budget_status(budget)
 
-    total_expense = Decimal(total_expense_raw or 0)
-    remaining = Decimal(budget.limit) - total_expense
-    exceeded = remaining < 0
 
-    return schemas.BudgetStatus(
-        budget=budget,
-        total_expense=total_expense,
-        remaining=remaining,
-        exceeded=exceeded,
-    )
+@router.get("/{budget_id}/status", response_model=schemas.BudgetStatus)
+async def get_budget_status(
+    budget_id: int,
+    db: DbSession = Depends(get_read_session),
+    current_user: Principal = Depends(get_current_user)
+):
+    return await run_db(db, _get_budget_status, budget_id, current_user.id)
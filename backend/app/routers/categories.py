@@ -4,26 +4,38 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
-from ..db import get_db
-from ..auth import get_current_user
+from ..pagination import (
+    CURSOR_DESCRIPTION,
+    INCLUDE_TOTAL_DESCRIPTION,
+    TotalMode,
+    paginate,
+)
+from ..deps import DbSession, get_read_session, get_session, run_db
+from ..auth import Principal, get_current_user
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
 
-@router.post(
-    "/",
-    response_model=schemas.CategoryRead,
-    status_code=status.HTTP_201_CREATED,
-)
-def create_category(
-    category_in: schemas.CategoryCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
-):
+def _get_user_category(
+    db: Session, category_id: int, user_id: int
+) -> Optional[models.Category]:
+    return (
+        db.query(models.Category)
+        .filter(
+            models.Category.id == category_id,
+            models.Category.user_id == user_id
+            )
+        .first()
+    )
+
+
+def _create_category(
+    db: Session, category_in: schemas.CategoryCreate, user_id: int
+) -> schemas.CategoryRead:
     existing = (
         db.query(models.Category)
         .filter(
-            models.Category.user_id == current_user.id,
+            models.Category.user_id == user_id,
             models.Category.name == category_in.name,
         )
         .first()
@@ -35,61 +47,95 @@ def create_category(
         )
 
     category = models.Category(
-        **category_in.model_dump(), user_id=current_user.id
+        **category_in.model_dump(), user_id=user_id
     )
     db.add(category)
+    db.flush()
+    result = schemas.CategoryRead.model_validate(category)
     db.commit()
-    db.refresh(category)
-    return category
+    return result
 
 
-@router.get("/", response_model=schemas.CategoryListResponse)
-def list_categories(
-    limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
-    search: Optional[str] = Query(None)
+@router.post(
+    "/",
+    response_model=schemas.CategoryRead,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_category(
+    category_in: schemas.CategoryCreate,
+    db: DbSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
 ):
+    return await run_db(db, _create_category, category_in, current_user.id)
+
+
+def _list_categories(
+    db: Session,
+    user_id: int,
+    limit: int,
+    offset: int,
+    search: Optional[str],
+    cursor: Optional[str],
+    include_total: TotalMode,
+) -> schemas.CategoryListResponse:
 
     query = db.query(models.Category).filter(
-        models.Category.user_id == current_user.id
+        models.Category.user_id == user_id
     )
 
     if search:
         query = query.filter(models.Category.name.ilike(f"%{search}%"))
 
-    total = query.count()
-
-    items = (
-        query.order_by(models.Category.name.asc())
-        .offset(offset)
-        .limit(limit)
-        .all()
+    # id breaks ties so the keyset stays strict even if names ever collide
+    page = paginate(
+        query,
+        entity=models.Category,
+        sort_key=(models.Category.name, models.Category.id),
+        descending=False,
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        cursor_types=(str, int),
+        include_total=include_total,
+        count_cache_key=(user_id, ("categories", search)),
     )
 
     return schemas.CategoryListResponse(
-        items=items,
-        total=total,
+        items=page.items,
+        total=page.total,
+        total_accuracy=page.total_accuracy,
         limit=limit,
-        offset=offset
+        offset=offset,
+        next_cursor=page.next_cursor,
     )
 
 
-@router.get("/{category_id}", response_model=schemas.CategoryRead)
-def get_category(
-    category_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+@router.get("/", response_model=schemas.CategoryListResponse)
+async def list_categories(
+    limit: int = Query(50, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: DbSession = Depends(get_read_session),
+    current_user: Principal = Depends(get_current_user),
+    search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    include_total: TotalMode = Query("exact", description=INCLUDE_TOTAL_DESCRIPTION),
 ):
-    category = (
-        db.query(models.Category)
-        .filter(
-            models.Category.id == category_id,
-            models.Category.user_id == current_user.id
-            )
-        .first()
+    return await run_db(
+        db,
+        _list_categories,
+        current_user.id,
+        limit,
+        offset,
+        search,
+        cursor,
+        include_total,
     )
+
+
+def _get_category(
+    db: Session, category_id: int, user_id: int
+) -> models.Category:
+    category = _get_user_category(db, category_id, user_id)
     if category is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -98,23 +144,17 @@ def get_category(
     return category
 
 
-@router.delete(
-    "/{category_id}",
-    status_code=status.HTTP_204_NO_CONTENT,
-)
-def delete_category(
+@router.get("/{category_id}", response_model=schemas.CategoryRead)
+async def get_category(
     category_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: DbSession = Depends(get_read_session),
+    current_user: Principal = Depends(get_current_user)
 ):
-    category = (
-        db.query(models.Category)
-        .filter(
-            models.Category.id == category_id,
-            models.Category.user_id == current_user.id
-            )
-        .first()
-    )
+    return await run_db(db, _get_category, category_id, current_user.id)
+
+
+def _delete_category(db: Session, category_id: int, user_id: int) -> None:
+    category = _get_user_category(db, category_id, user_id)
     if category is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -135,3 +175,15 @@ def delete_category(
 
     db.delete(category)
     db.commit()
+
+
+@router.delete(
+    "/{category_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def delete_category(
+    category_id: int,
+    db: DbSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user)
+):
+    await run_db(db, _delete_category, category_id, current_user.id)
@@ -1,106 +1,87 @@
-from datetime import date
+from datetime import date, timedelta
 from decimal import Decimal
-from typing import Optional, Literal
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Literal, Tuple
 
 import csv
 import io
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import StreamingResponse
-from sqlalchemy import func, case
+from sqlalchemy import func, case, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import models, schemas
-from app.db import get_db
-from app.auth import get_current_user
+from app.deps import DbSession, get_read_session, run_db
+from app.auth import Principal, get_current_user
+from app.rollups import UNCATEGORIZED
 
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
 
-@router.get("/summary", response_model=schemas.SummaryResponse)
-def get_summary(
-    start_date: Optional[date] = Query(None),
-    end_date: Optional[date] = Query(None),
-    group_by: Optional[Literal["category"]] = Query(
-        None,
-        description="Optional grouping for summary. Currently supports: 'category'.",
-    ),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
-):
-    # Base filtered query for this user + date range
-    base_query = db.query(models.Transaction).filter(
-        models.Transaction.user_id == current_user.id
-    )
+def _get_summary(
+    db: Session,
+    user_id: int,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    group_by: Optional[str],
+) -> schemas.SummaryResponse:
+    # One aggregate pass over the daily rollups (rows per day, not per
+    # transaction): per-category income/expense; the overall totals are
+    # derived from the grouped rows instead of re-scanning the same range.
+    rollup = models.DailyRollup
+    columns = [
+        rollup.category_key,
+        func.sum(
+            case(
+                (rollup.type == "income", rollup.total_amount),
+                else_=0,
+            )
+        ).label("total_income"),
+        func.sum(
+            case(
+                (rollup.type == "expense", rollup.total_amount),
+                else_=0,
+            )
+        ).label("total_expense"),
+    ]
+    group_columns = [rollup.category_key]
+    if group_by == "category":
+        columns.insert(1, models.Category.name)
+        group_columns.append(models.Category.name)
+
+    grouped_rows = db.query(*columns).filter(rollup.user_id == user_id)
+    if group_by == "category":
+        grouped_rows = grouped_rows.outerjoin(
+            models.Category,
+            rollup.category_key == models.Category.id,
+        )
 
     if start_date is not None:
-        base_query = base_query.filter(models.Transaction.date >= start_date)
+        grouped_rows = grouped_rows.filter(rollup.date >= start_date)
     if end_date is not None:
-        base_query = base_query.filter(models.Transaction.date <= end_date)
-
-    # Totals for income + expense
-    income_q = base_query.filter(models.Transaction.type == "income")
-    expense_q = base_query.filter(models.Transaction.type == "expense")
+        grouped_rows = grouped_rows.filter(rollup.date <= end_date)
 
-    total_income = income_q.with_entities(
-        func.coalesce(func.sum(models.Transaction.amount), 0)
-    ).scalar() or Decimal("0")
+    results = grouped_rows.group_by(*group_columns).all()
 
-    total_expense = expense_q.with_entities(
-        func.coalesce(func.sum(models.Transaction.amount), 0)
-    ).scalar() or Decimal("0")
+    total_income = sum(
+        (row.total_income or Decimal("0") for row in results), Decimal("0")
+    ) or Decimal("0")
+    total_expense = sum(
+        (row.total_expense or Decimal("0") for row in results), Decimal("0")
+    ) or Decimal("0")
 
     net = total_income - total_expense
 
     by_category: Optional[list[schemas.CategorySummaryItem]] = None
 
     if group_by == "category":
-        # Group by category, splitting income/expense per category
-        grouped_rows = (
-            db.query(
-                models.Transaction.category_id,
-                models.Category.name,
-                func.coalesce(
-                    func.sum(
-                        case(
-                            (models.Transaction.type == "income", models.Transaction.amount),
-                            else_=0,
-                        )
-                    ),
-                    0,
-                ).label("total_income"),
-                func.coalesce(
-                    func.sum(
-                        case(
-                            (models.Transaction.type == "expense", models.Transaction.amount),
-                            else_=0,
-                        )
-                    ),
-                    0,
-                ).label("total_expense"),
-            )
-            .outerjoin(
-                models.Category,
-                models.Transaction.category_id == models.Category.id,
-            )
-            .filter(models.Transaction.user_id == current_user.id)
-        )
-
-        if start_date is not None:
-            grouped_rows = grouped_rows.filter(models.Transaction.date >= start_date)
-        if end_date is not None:
-            grouped_rows = grouped_rows.filter(models.Transaction.date <= end_date)
-
-        grouped_rows = grouped_rows.group_by(
-            models.Transaction.category_id, models.Category.name
-        )
-
-        results = grouped_rows.all()
-
         by_category = [
             schemas.CategorySummaryItem(
-                category_id=row.category_id,
+                category_id=(
+                    None if row.category_key == UNCATEGORIZED else row.category_key
+                ),
                 category_name=row.name,
                 total_income=row.total_income or Decimal("0"),
                 total_expense=row.total_expense or Decimal("0"),
@@ -120,80 +101,315 @@ def get_summary(
     )
 
 
+@router.get("/summary", response_model=schemas.SummaryResponse)
+async def get_summary(
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    group_by: Optional[Literal["category"]] = Query(
+        None,
+        description="Optional grouping for summary. Currently supports: 'category'.",
+    ),
+    db: DbSession = Depends(get_read_session),
+    current_user: Principal = Depends(get_current_user),
+):
+    return await run_db(
+        db, _get_summary, current_user.id, start_date, end_date, group_by
+    )
 
-@router.get("/transactions/export")
-def export_transactions_csv(
+
+
+# Guard against e.g. bucket=day over decades
+MAX_TIMESERIES_BUCKETS = 2000
+
+Bucket = Literal["day", "week", "month"]
+
+
+def _bucket_expression(bucket: str, column):
+    """SQLite expression mapping a date column to its bucket's first day."""
+    if bucket == "week":
+        # ISO weeks: 'weekday 0' moves to the Sunday ending the week, -6 days to its Monday
+        return func.date(column, "weekday 0", "-6 days")
+    if bucket == "month":
+        return func.strftime("%Y-%m-01", column)
+    return func.date(column)
+
+
+def _bucket_floor(value: date, bucket: str) -> date:
+    if bucket == "week":
+        return value - timedelta(days=value.weekday())
+    if bucket == "month":
+        return value.replace(day=1)
+    return value
+
+
+def _next_bucket(value: date, bucket: str) -> date:
+    if bucket == "week":
+        return value + timedelta(days=7)
+    if bucket == "month":
+        return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+    return value + timedelta(days=1)
+
+
+def _get_timeseries(
+    db: Session,
+    user_id: int,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    bucket: str,
+    group_by: Optional[str],
+    type: Optional[str],
+) -> schemas.TimeseriesResponse:
+    rollup = models.DailyRollup
+    bucket_col = _bucket_expression(bucket, rollup.date).label("bucket_start")
+
+    # Every bucket (and category) in one grouped pass over the daily rollups
+    columns = [
+        bucket_col,
+        func.sum(
+            case((rollup.type == "income", rollup.total_amount), else_=0)
+        ).label("total_income"),
+        func.sum(
+            case((rollup.type == "expense", rollup.total_amount), else_=0)
+        ).label("total_expense"),
+        func.sum(rollup.tx_count).label("tx_count"),
+    ]
+    group_columns = [bucket_col]
+    if group_by == "category":
+        columns[1:1] = [rollup.category_key, models.Category.name]
+        group_columns += [rollup.category_key, models.Category.name]
+
+    query = db.query(*columns).filter(rollup.user_id == user_id)
+    if group_by == "category":
+        query = query.outerjoin(models.Category, rollup.category_key == models.Category.id)
+    if start_date is not None:
+        query = query.filter(rollup.date >= start_date)
+    if end_date is not None:
+        query = query.filter(rollup.date <= end_date)
+    if type is not None:
+        query = query.filter(rollup.type == type)
+
+    rows = query.group_by(*group_columns).all()
+
+    # (category_key, category_name) -> {bucket_start: row}
+    series_rows: Dict[Tuple[Optional[int], Optional[str]], Dict[date, object]] = {}
+    for row in rows:
+        series_key = (
+            (row.category_key, row.name) if group_by == "category" else (None, None)
+        )
+        series_rows.setdefault(series_key, {})[date.fromisoformat(row.bucket_start)] = row
+
+    seen_buckets = [b for buckets in series_rows.values() for b in buckets]
+    first = start_date or (min(seen_buckets) if seen_buckets else None)
+    last = end_date or (max(seen_buckets) if seen_buckets else None)
+
+    # Fill empty buckets server-side so every series has the same x-axis
+    bucket_starts: List[date] = []
+    if first is not None and last is not None:
+        current = _bucket_floor(first, bucket)
+        while current <= last:
+            bucket_starts.append(current)
+            if len(bucket_starts) > MAX_TIMESERIES_BUCKETS:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Date range spans too many buckets.",
+                )
+            current = _next_bucket(current, bucket)
+
+    if not series_rows and group_by != "category":
+        series_rows[(None, None)] = {}
+
+    series = []
+    for (category_key, category_name), by_bucket in series_rows.items():
+        points = []
+        for bucket_start in bucket_starts:
+            row = by_bucket.get(bucket_start)
+            income = (row.total_income if row else None) or Decimal("0")
+            expense = (row.total_expense if row else None) or Decimal("0")
+            points.append(
+                schemas.TimeseriesPoint(
+                    bucket_start=bucket_start,
+                    total_income=income,
+                    total_expense=expense,
+                    net=income - expense,
+                    tx_count=row.tx_count if row else 0,
+                )
+            )
+        series.append(
+            schemas.TimeseriesSeries(
+                category_id=(
+                    None if category_key in (None, UNCATEGORIZED) else category_key
+                ),
+                category_name=category_name,
+                points=points,
+            )
+        )
+
+    return schemas.TimeseriesResponse(
+        start_date=start_date,
+        end_date=end_date,
+        bucket=bucket,
+        series=series,
+    )
+
+
+@router.get("/timeseries", response_model=schemas.TimeseriesResponse)
+async def get_timeseries(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    category_id: Optional[int] = Query(None),
-    type: Optional[Literal["income", "expense"]] = Query(None),
-    min_amount: Optional[float] = Query(None),
-    max_amount: Optional[float] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    bucket: Bucket = Query(
+        "month",
+        description="Bucket width: day, week (ISO, Monday start) or month.",
+    ),
+    group_by: Optional[Literal["category"]] = Query(
+        None,
+        description="Optional split into one series per category.",
+    ),
+    type: Optional[Literal["income", "expense"]] = Query(
+        None,
+        description="Only count income or expense transactions.",
+    ),
+    db: DbSession = Depends(get_read_session),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
-    Export the user's transactions as CSV, honoring common filters.
+    Income/expense totals per day, week or month, for drawing charts in one call.
+    Buckets with no transactions are returned with zero totals.
     """
-    query = db.query(models.Transaction).filter(
-        models.Transaction.user_id == current_user.id
+    return await run_db(
+        db,
+        _get_timeseries,
+        current_user.id,
+        start_date,
+        end_date,
+        bucket,
+        group_by,
+        type,
     )
 
+
+# Rows fetched from the cursor (and encoded) per chunk of the CSV export
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    models.Transaction.id,
+    models.Transaction.date,
+    models.Transaction.amount,
+    models.Transaction.type,
+    models.Transaction.description,
+    models.Transaction.category_id,
+    models.Transaction.budget_id,
+)
+
+
+def _export_statement(
+    user_id: int,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    category_id: Optional[int],
+    type: Optional[str],
+    min_amount: Optional[float],
+    max_amount: Optional[float],
+):
+    # Plain column tuples: no identity map, no per-row ORM object
+    stmt = select(*EXPORT_COLUMNS).where(models.Transaction.user_id == user_id)
+
     if start_date is not None:
-        query = query.filter(models.Transaction.date >= start_date)
+        stmt = stmt.where(models.Transaction.date >= start_date)
     if end_date is not None:
-        query = query.filter(models.Transaction.date <= end_date)
+        stmt = stmt.where(models.Transaction.date <= end_date)
     if category_id is not None:
-        query = query.filter(models.Transaction.category_id == category_id)
+        stmt = stmt.where(models.Transaction.category_id == category_id)
     if type is not None:
-        query = query.filter(models.Transaction.type == type)
+        stmt = stmt.where(models.Transaction.type == type)
     if min_amount is not None:
-        query = query.filter(models.Transaction.amount >= Decimal(str(min_amount)))
+        stmt = stmt.where(models.Transaction.amount >= Decimal(str(min_amount)))
     if max_amount is not None:
-        query = query.filter(models.Transaction.amount <= Decimal(str(max_amount)))
+        stmt = stmt.where(models.Transaction.amount <= Decimal(str(max_amount)))
 
-    transactions = (
-        query.order_by(models.Transaction.date.asc(), models.Transaction.id.asc())
-        .all()
+    return (
+        stmt.order_by(models.Transaction.date.asc(), models.Transaction.id.asc())
+        .execution_options(stream_results=True, yield_per=EXPORT_CHUNK_SIZE)
     )
 
+
+def _encode_csv_rows(rows) -> str:
     output = io.StringIO()
     writer = csv.writer(output)
-
-    # CSV header
-    writer.writerow(
-        [
-            "id",
-            "date",
-            "amount",
-            "type",
-            "description",
-            "category_id",
-            "budget_id",
-        ]
-    )
-
-    for tx in transactions:
+    for tx_id, tx_date, amount, tx_type, description, tx_category_id, tx_budget_id in rows:
         writer.writerow(
             [
-                tx.id,
-                tx.date.isoformat() if tx.date else "",
-                str(tx.amount),
-                tx.type,
-                tx.description or "",
-                tx.category_id if tx.category_id is not None else "",
-                tx.budget_id if tx.budget_id is not None else "",
+                tx_id,
+                tx_date.isoformat() if tx_date else "",
+                str(amount),
+                tx_type,
+                description or "",
+                tx_category_id if tx_category_id is not None else "",
+                tx_budget_id if tx_budget_id is not None else "",
             ]
         )
+    return output.getvalue()
+
+
+# CSV header (csv.writer's default \r\n line terminator)
+EXPORT_HEADER = "id,date,amount,type,description,category_id,budget_id\r\n"
+
+
+def _iter_csv(db: Session, stmt) -> Iterator[str]:
+    yield EXPORT_HEADER
+    result = db.execute(stmt)
+    try:
+        for rows in result.partitions():
+            yield _encode_csv_rows(rows)
+    finally:
+        result.close()
+
+
+async def _aiter_csv(db: AsyncSession, stmt) -> AsyncIterator[str]:
+    yield EXPORT_HEADER
+    result = await db.stream(stmt)
+    try:
+        async for rows in result.partitions():
+            yield _encode_csv_rows(rows)
+    finally:
+        await result.close()
+
 
-    output.seek(0)
+@router.get("/transactions/export")
+async def export_transactions_csv(
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    category_id: Optional[int] = Query(None),
+    type: Optional[Literal["income", "expense"]] = Query(None),
+    min_amount: Optional[float] = Query(None),
+    max_amount: Optional[float] = Query(None),
+    db: DbSession = Depends(get_read_session),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Export the user's transactions as CSV, honoring common filters.
+
+    Rows are streamed from a server-side cursor in chunks of EXPORT_CHUNK_SIZE
+    and encoded as they arrive, so memory stays flat regardless of history size.
+    The session dependency is only closed after the response has been sent.
+    """
+    stmt = _export_statement(
+        current_user.id,
+        start_date,
+        end_date,
+        category_id,
+        type,
+        min_amount,
+        max_amount,
+    )
+    # Sync iterators are driven from the threadpool by StreamingResponse
+    body = _aiter_csv(db, stmt) if isinstance(db, AsyncSession) else _iter_csv(db, stmt)
 
     headers = {
         "Content-Disposition": 'attachment; filename="transactions.csv"'
     }
 
     return StreamingResponse(
-        output,
+        body,
         media_type="text/csv",
         headers=headers,
     )
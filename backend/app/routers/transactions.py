@@ -1,33 +1,54 @@
 from typing import List, Optional, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import insert, literal, select, union_all
+from sqlalchemy.orm import Session, joinedload
 from starlette.status import HTTP_204_NO_CONTENT
 from datetime import date
 
 from .. import models, schemas
-from ..db import get_db
-from ..auth import get_current_user
+from ..pagination import (
+    CURSOR_DESCRIPTION,
+    INCLUDE_TOTAL_DESCRIPTION,
+    TotalMode,
+    invalidate_counts_on_commit,
+    paginate,
+)
+from ..budget_counters import apply_budget_deltas, contributions_for_rows
+from ..rollups import apply_rollup_deltas, deltas_for_rows
+from ..deps import DbSession, get_read_session, get_session, run_db
+from ..auth import Principal, get_current_user
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
 
-@router.post(
-    "/",
-    response_model=schemas.TransactionRead,
-    status_code=status.HTTP_201_CREATED,
-)
-def create_transaction(
-    tx_in: schemas.TransactionCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
-):
+def _get_user_transaction(
+    db: Session, transaction_id: int, user_id: int, with_category: bool = False
+) -> Optional[models.Transaction]:
+    query = db.query(models.Transaction)
+    if with_category:
+        # TransactionRead nests the category; join it rather than lazy-load it
+        query = query.options(joinedload(models.Transaction.category))
+    return (
+        query
+        .filter(
+            models.Transaction.id == transaction_id,
+            models.Transaction.user_id == user_id,
+            )
+        .first()
+    )
+
+
+def _create_transaction(
+    db: Session, tx_in: schemas.TransactionCreate, user_id: int
+) -> schemas.TransactionRead:
+    category = None
     if tx_in.category_id is not None:
         category = (
             db.query(models.Category)
             .filter(
                 models.Category.id == tx_in.category_id,
-                models.Category.user_id == current_user.id,
+                models.Category.user_id == user_id,
             )
             .first()
         )
@@ -38,30 +59,163 @@ def create_transaction(
             )
 
     tx_data = tx_in.model_dump()
-    tx = models.Transaction(**tx_data, user_id=current_user.id)
+    tx = models.Transaction(**tx_data, user_id=user_id)
+    if category is not None:
+        tx.category = category
 
     db.add(tx)
+    # INSERT ... RETURNING fills in id and the timestamps; serialize before
+    # the commit expires them
+    db.flush()
+    result = schemas.TransactionRead.model_validate(tx)
     db.commit()
-    db.refresh(tx)
-    return tx
+    return result
 
 
+@router.post(
+    "/",
+    response_model=schemas.TransactionRead,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_transaction(
+    tx_in: schemas.TransactionCreate,
+    db: DbSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
+):
+    return await run_db(db, _create_transaction, tx_in, current_user.id)
 
-@router.get("/", response_model=schemas.TransactionListResponse)
-def list_transactions(
-    limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0),
-    start_date: Optional[date] = Query(None),
-    end_date: Optional[date] = Query(None),
-    category_id: Optional[int] = Query(None),
-    type: Optional[Literal["income", "expense"]] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
-    min_amount: Optional[float] = Query(None),
-    max_amount: Optional[float] = Query(None),
+
+def _owned_reference_ids(
+    db: Session, user_id: int, category_ids: set, budget_ids: set
+) -> tuple:
+    """Return the subsets of category/budget ids owned by the user, in one query."""
+    selects = []
+    if category_ids:
+        selects.append(
+            select(literal("category").label("kind"), models.Category.id)
+            .where(models.Category.user_id == user_id)
+            .where(models.Category.id.in_(category_ids))
+        )
+    if budget_ids:
+        selects.append(
+            select(literal("budget").label("kind"), models.Budget.id)
+            .where(models.Budget.user_id == user_id)
+            .where(models.Budget.id.in_(budget_ids))
+        )
+    if not selects:
+        return set(), set()
+
+    stmt = selects[0] if len(selects) == 1 else union_all(*selects)
+    owned = {"category": set(), "budget": set()}
+    for kind, ref_id in db.execute(stmt):
+        owned[kind].add(ref_id)
+    return owned["category"], owned["budget"]
+
+
+def _bulk_create_transactions(
+    db: Session, bulk_in: schemas.TransactionBulkCreate, user_id: int
+) -> schemas.TransactionBulkResponse:
+    items = bulk_in.items
+    owned_categories, owned_budgets = _owned_reference_ids(
+        db,
+        user_id,
+        {tx.category_id for tx in items if tx.category_id is not None},
+        {tx.budget_id for tx in items if tx.budget_id is not None},
+    )
+
+    errors = {}
+    for index, tx in enumerate(items):
+        if tx.category_id is not None and tx.category_id not in owned_categories:
+            errors[index] = "Category does not exist."
+        elif tx.budget_id is not None and tx.budget_id not in owned_budgets:
+            errors[index] = "Budget does not exist."
+
+    if errors and bulk_in.mode == "atomic":
+        return schemas.TransactionBulkResponse(
+            created=0,
+            failed=len(errors),
+            results=[
+                schemas.TransactionBulkItemResult(
+                    index=index,
+                    status="failed" if index in errors else "skipped",
+                    error=errors.get(index),
+                )
+                for index in range(len(items))
+            ],
+        )
+
+    valid = [index for index in range(len(items)) if index not in errors]
+    new_ids = []
+    if valid:
+        # One executemany INSERT ... RETURNING inside a single transaction
+        rows = [{**items[index].model_dump(), "user_id": user_id} for index in valid]
+        new_ids = db.execute(
+            insert(models.Transaction).returning(
+                models.Transaction.id, sort_by_parameter_order=True
+            ),
+            rows,
+        ).scalars().all()
+        # The bulk INSERT skips flush events, so keep derived state in step here
+        apply_rollup_deltas(db.connection(), deltas_for_rows(rows))
+        apply_budget_deltas(db.connection(), contributions_for_rows(rows))
+        invalidate_counts_on_commit(db, user_id)
+        db.commit()
+
+    created_ids = dict(zip(valid, new_ids))
+    return schemas.TransactionBulkResponse(
+        created=len(created_ids),
+        failed=len(errors),
+        results=[
+            schemas.TransactionBulkItemResult(
+                index=index,
+                status="created" if index in created_ids else "failed",
+                id=created_ids.get(index),
+                error=errors.get(index),
+            )
+            for index in range(len(items))
+        ],
+    )
+
+
+@router.post(
+    "/bulk",
+    response_model=schemas.TransactionBulkResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def bulk_create_transactions(
+    bulk_in: schemas.TransactionBulkCreate,
+    response: Response,
+    db: DbSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
 ):
+    """
+    Create many transactions in one request and one database transaction.
+
+    Returns a result per submitted item (same order). Responds 400 when nothing
+    was created, i.e. any invalid item in atomic mode or all invalid in partial mode.
+    """
+    result = await run_db(db, _bulk_create_transactions, bulk_in, current_user.id)
+    if result.created == 0:
+        response.status_code = status.HTTP_400_BAD_REQUEST
+    return result
+
+
+def _list_transactions(
+    db: Session,
+    user_id: int,
+    limit: int,
+    offset: int,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    category_id: Optional[int],
+    type: Optional[str],
+    min_amount: Optional[float],
+    max_amount: Optional[float],
+    cursor: Optional[str],
+    include_total: TotalMode,
+) -> schemas.TransactionListResponse:
     query = db.query(models.Transaction).filter(
-        models.Transaction.user_id == current_user.id
+        models.Transaction.user_id == user_id
     )
 
     if start_date is not None:
@@ -77,59 +231,93 @@ def list_transactions(
     if type is not None:
         query = query.filter(models.Transaction.type == type)
 
-    total = query.count()
-    items = (
-        query.order_by(models.Transaction.date.desc(), models.Transaction.id.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
+    page = paginate(
+        query,
+        entity=models.Transaction,
+        sort_key=(models.Transaction.date, models.Transaction.id),
+        descending=True,
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        cursor_types=(date, int),
+        include_total=include_total,
+        count_cache_key=(
+            user_id,
+            ("transactions", start_date, end_date, category_id, type, min_amount, max_amount),
+        ),
+        eager_load=("category",),
     )
 
     return schemas.TransactionListResponse(
-        items = items,
-        total = total,
+        items = page.items,
+        total = page.total,
+        total_accuracy = page.total_accuracy,
         limit = limit,
-        offset = offset
+        offset = offset,
+        next_cursor = page.next_cursor,
     )
 
 
-@router.get("/{transaction_id}", response_model=schemas.TransactionRead)
-def get_transaction(
-    transaction_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+@router.get("/", response_model=schemas.TransactionListResponse)
+async def list_transactions(
+    limit: int = Query(50, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    category_id: Optional[int] = Query(None),
+    type: Optional[Literal["income", "expense"]] = Query(None),
+    db: DbSession = Depends(get_read_session),
+    current_user: Principal = Depends(get_current_user),
+    min_amount: Optional[float] = Query(None),
+    max_amount: Optional[float] = Query(None),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    include_total: TotalMode = Query("exact", description=INCLUDE_TOTAL_DESCRIPTION),
 ):
-    tx = (
-        db.query(models.Transaction)
-        .filter(
-            models.Transaction.id == transaction_id,
-            models.Transaction.user_id == current_user.id,
-            )
-        .first()
+    return await run_db(
+        db,
+        _list_transactions,
+        current_user.id,
+        limit,
+        offset,
+        start_date,
+        end_date,
+        category_id,
+        type,
+        min_amount,
+        max_amount,
+        cursor,
+        include_total,
     )
+
+
+def _get_transaction(
+    db: Session, transaction_id: int, user_id: int
+) -> schemas.TransactionRead:
+    tx = _get_user_transaction(db, transaction_id, user_id, with_category=True)
     if tx is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Transaction not found."
         )
-    return tx
+    return schemas.TransactionRead.model_validate(tx)
 
 
-@router.put("/{transaction_id}", response_model=schemas.TransactionRead)
-def update_transaction(
+@router.get("/{transaction_id}", response_model=schemas.TransactionRead)
+async def get_transaction(
     transaction_id: int,
-    tx_update: schemas.TransactionUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: DbSession = Depends(get_read_session),
+    current_user: Principal = Depends(get_current_user)
 ):
-    tx = (
-        db.query(models.Transaction)
-        .filter(
-            models.Transaction.id == transaction_id,
-            models.Transaction.user_id == current_user.id
-            )
-        .first()
-    )
+    return await run_db(db, _get_transaction, transaction_id, current_user.id)
+
+
+def _update_transaction(
+    db: Session,
+    transaction_id: int,
+    tx_update: schemas.TransactionUpdate,
+    user_id: int,
+) -> schemas.TransactionRead:
+    tx = _get_user_transaction(db, transaction_id, user_id, with_category=True)
     if tx is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -139,6 +327,7 @@ def update_transaction(
     update_data = tx_update.model_dump(exclude_unset=True)
 
     # Validate category if updated
+    category = None
     if "category_id" in update_data and update_data["category_id"] is not None:
         category = db.query(models.Category).filter(
             models.Category.id == update_data["category_id"]
@@ -151,29 +340,36 @@ def update_transaction(
 
     for field, value in update_data.items():
         setattr(tx, field, value)
+    if category is not None:
+        tx.category = category
+    elif "category_id" in update_data:
+        # Never assign None to the relationship: Category.transactions
+        # cascades delete-orphan, so the flush would DELETE the row behind
+        # the rollup/budget listeners' backs. category_id = None above is
+        # the change; just drop the stale loaded category.
+        db.expire(tx, ["category"])
 
+    # UPDATE ... RETURNING brings back updated_at
+    db.flush()
+    result = schemas.TransactionRead.model_validate(tx)
     db.commit()
-    db.refresh(tx)
-    return tx
+    return result
 
 
-@router.delete(
-    "/{transaction_id}",
-    status_code=HTTP_204_NO_CONTENT,
-)
-def delete_transaction(
+@router.put("/{transaction_id}", response_model=schemas.TransactionRead)
+async def update_transaction(
     transaction_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    tx_update: schemas.TransactionUpdate,
+    db: DbSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user)
 ):
-    tx = (
-        db.query(models.Transaction)
-        .filter(
-            models.Transaction.id == transaction_id,
-            models.Transaction.user_id == current_user.id
-            )
-        .first()
+    return await run_db(
+        db, _update_transaction, transaction_id, tx_update, current_user.id
     )
+
+
+def _delete_transaction(db: Session, transaction_id: int, user_id: int) -> None:
+    tx = _get_user_transaction(db, transaction_id, user_id)
     if tx is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -181,4 +377,16 @@ def delete_transaction(
         )
     
     db.delete(tx)
-    db.commit()
\ No newline at end of file
+    db.commit()
+
+
+@router.delete(
+    "/{transaction_id}",
+    status_code=HTTP_204_NO_CONTENT,
+)
+async def delete_transaction(
+    transaction_id: int,
+    db: DbSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user)
+):
+    await run_db(db, _delete_transaction, transaction_id, current_user.id)
@@ -1,5 +1,6 @@
+import datetime as dt
 from datetime import datetime, date
-from typing import Optional, List
+from typing import Optional, List, Literal
 from pydantic import BaseModel, Field, ConfigDict, EmailStr, field_serializer
 from decimal import Decimal
 
@@ -45,10 +46,35 @@ class TransactionRead(TransactionBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+# Upper bound on items per POST /transactions/bulk request
+BULK_MAX_ITEMS = 5000
+
+
+class TransactionBulkCreate(BaseModel):
+    items: List[TransactionCreate] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+    # atomic: any invalid item rejects the whole batch
+    # partial: valid items are inserted, invalid ones are reported
+    mode: Literal["atomic", "partial"] = "atomic"
+
+
+class TransactionBulkItemResult(BaseModel):
+    index: int
+    status: Literal["created", "failed", "skipped"]
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class TransactionBulkResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[TransactionBulkItemResult]
+
+
 class TransactionUpdate(BaseModel):
     amount: Optional[Decimal] = Field(None, max_digits=10, decimal_places=2)
     description: Optional[str] = Field(None, max_length=255)
-    date: Optional[date] = None
+    # dt.date: a bare `date` here would resolve to this field's own default (None)
+    date: Optional[dt.date] = None
     type: Optional[str] = Field(None, pattern="^(income|expense)$")
     category_id: Optional[int] = None
     budget_id: Optional[int] = None
@@ -74,6 +100,28 @@ class SummaryResponse(BaseModel):
     by_category: Optional[List[CategorySummaryItem]] = None
 
 
+class TimeseriesPoint(BaseModel):
+    bucket_start: date
+    total_income: Decimal
+    total_expense: Decimal
+    net: Decimal
+    tx_count: int
+
+
+class TimeseriesSeries(BaseModel):
+    # Both None for the ungrouped series and for uncategorized transactions
+    category_id: Optional[int] = None
+    category_name: Optional[str] = None
+    points: List[TimeseriesPoint]
+
+
+class TimeseriesResponse(BaseModel):
+    start_date: date | None = None
+    end_date: date | None = None
+    bucket: Literal["day", "week", "month"]
+    series: List[TimeseriesSeries]
+
+
 class BudgetBase(BaseModel):
     name: str = Field(..., max_length=100)
     limit: Decimal = Field(..., max_digits=10, decimal_places=2)
@@ -96,6 +144,7 @@ class BudgetRead(BudgetBase):
 class BudgetStatus(BaseModel):
     budget: BudgetRead
     total_expense: Decimal
+    tx_count: int = 0
     remaining: Decimal
     exceeded: bool
 
@@ -119,16 +168,27 @@ class UserRead(UserBase):
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+
+
+class TokenRefresh(BaseModel):
+    refresh_token: str
 
 
 class TokenData(BaseModel):
     sub: Optional[str] = None  # subject = user email
+    uid: Optional[int] = None  # user id; absent on legacy email-only tokens
+    ver: Optional[int] = None  # users.token_version at issue time
 
 
 class PaginatedResponseBase(BaseModel):
-    total: int
+    # None when the client asked for include_total=none
+    total: Optional[int]
+    total_accuracy: Literal["exact", "estimated", "omitted"] = "exact"
     limit: int
     offset: int
+    # Opaque keyset cursor for the next page; None on the last page
+    next_cursor: Optional[str] = None
 
 
 class TransactionListResponse(PaginatedResponseBase):
@@ -139,10 +199,30 @@ class BudgetListResponse(PaginatedResponseBase):
     items: List[BudgetRead]
 
 
+class BudgetStatusListResponse(PaginatedResponseBase):
+    items: List[BudgetStatus]
+
+
 class CategoryListResponse(PaginatedResponseBase):
     items: List[CategoryRead]
 
 
+class SlowQueryRead(BaseModel):
+    recorded_at: datetime
+    duration_ms: float
+    statement: str  # normalized: literals replaced by ?
+    parameter_shape: str  # parameter types only, never values
+    plan: Optional[List[str]] = None  # EXPLAIN QUERY PLAN detail lines
+    full_scan: bool
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SlowQueryListResponse(BaseModel):
+    threshold_ms: float
+    items: List[SlowQueryRead]
+
+
 class ErrorResponse(BaseModel):
     detail: str
     code: str | None = None
@@ -0,0 +1,184 @@
+# app/slow_queries.py
+"""
+Slow-query recorder.
+
+Statements slower than ``threshold_ms`` are logged (logger
+``app.slow_query``) and kept in a bounded ring for the admin endpoint,
+together with their normalized SQL, the shape of their bound parameters
+and SQLite's ``EXPLAIN QUERY PLAN``. The plan is captured once per
+distinct statement and cached, so a hot slow query costs one EXPLAIN.
+"""
+import logging
+import re
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Any, Deque, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import database_settings
+
+logger = logging.getLogger("app.slow_query")
+
+# Distinct statements whose plan we remember
+PLAN_CACHE_SIZE = 512
+
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse whitespace and replace literals so equivalent statements group."""
+    sql = _STRING_RE.sub("?", statement)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("(?, ...)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+def _type_name(value: Any) -> str:
+    return "NULL" if value is None else type(value).__name__
+
+
+def parameter_shape(parameters: Any, executemany: bool) -> str:
+    """Types of the bound parameters, never their values."""
+    if executemany:
+        rows = list(parameters)
+        first = parameter_shape(rows[0], False) if rows else "()"
+        return f"{first} x{len(rows)}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {_type_name(v)}" for k, v in parameters.items()) + "}"
+    if parameters is None:
+        return "()"
+    return "(" + ", ".join(_type_name(v) for v in parameters) + ")"
+
+
+def _is_full_scan(plan: List[str]) -> bool:
+    return any(
+        line.startswith("SCAN ") and not line.startswith("SCAN CONSTANT ROW")
+        for line in plan
+    )
+
+
+@dataclass
+class SlowQuery:
+    recorded_at: datetime
+    duration_ms: float
+    statement: str
+    parameter_shape: str
+    plan: Optional[List[str]]
+    full_scan: bool
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float, max_entries: int):
+        # 0 disables recording (timers are not even started)
+        self.threshold_ms = threshold_ms
+        self._entries: Deque[SlowQuery] = deque(maxlen=max(1, max_entries))
+        self._plans: "OrderedDict[str, Optional[List[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def install(self, engine: Engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        event.listen(engine, "handle_error", self._on_error)
+
+    def uninstall(self, engine: Engine) -> None:
+        event.remove(engine, "before_cursor_execute", self._before_execute)
+        event.remove(engine, "after_cursor_execute", self._after_execute)
+        event.remove(engine, "handle_error", self._on_error)
+
+    def entries(self) -> List[SlowQuery]:
+        """Recorded slow queries, newest first."""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._plans.clear()
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.threshold_ms > 0:
+            conn.info.setdefault("slow_query_start", []).append(perf_counter())
+
+    def _on_error(self, exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("slow_query_start"):
+            conn.info["slow_query_start"].pop()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("slow_query_start")
+        if not starts:
+            return
+        duration_ms = (perf_counter() - starts.pop()) * 1000.0
+        if self.threshold_ms <= 0 or duration_ms < self.threshold_ms:
+            return
+
+        plan = self._plan_for(conn, statement, parameters, executemany)
+        entry = SlowQuery(
+            recorded_at=datetime.now(timezone.utc),
+            duration_ms=round(duration_ms, 2),
+            statement=normalize_sql(statement),
+            parameter_shape=parameter_shape(parameters, executemany),
+            plan=plan,
+            full_scan=bool(plan) and _is_full_scan(plan),
+        )
+        with self._lock:
+            self._entries.append(entry)
+        logger.warning(
+            "slow_query",
+            extra={
+                "duration_ms": entry.duration_ms,
+                "statement": entry.statement,
+                "parameter_shape": entry.parameter_shape,
+                "plan": entry.plan,
+                "full_scan": entry.full_scan,
+            },
+        )
+
+    def _plan_for(self, conn, statement, parameters, executemany) -> Optional[List[str]]:
+        with self._lock:
+            if statement in self._plans:
+                self._plans.move_to_end(statement)
+                return self._plans[statement]
+
+        plan = self._explain(conn, statement, parameters, executemany)
+        with self._lock:
+            self._plans[statement] = plan
+            while len(self._plans) > PLAN_CACHE_SIZE:
+                self._plans.popitem(last=False)
+        return plan
+
+    @staticmethod
+    def _explain(conn, statement, parameters, executemany) -> Optional[List[str]]:
+        if conn.dialect.name != "sqlite":
+            return None
+        if not statement.lstrip().upper().startswith(_EXPLAINABLE):
+            return None
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        # Straight on the DBAPI connection: a second cursor leaves the caller's
+        # result set alone and bypasses our own execute events
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+            return [row[3] for row in cursor.fetchall()]
+        except Exception:
+            logger.debug("Could not explain statement", exc_info=True)
+            return None
+        finally:
+            cursor.close()
+
+
+slow_query_log = SlowQueryLog(
+    database_settings.slow_query_ms,
+    database_settings.slow_query_log_size,
+)
@@ -0,0 +1,79 @@
+"""
+Micro-benchmark: JsonFormatter cost for a typical ``request_completed`` record.
+
+Compares the previous formatter (standard-attribute set rebuilt per call,
+stdlib json) with the current one, using whichever encoder is installed.
+
+    cd backend && BUDGET_APP_SECRET_KEY=x python -m benchmarks.log_formatting
+"""
+import argparse
+import json
+import logging
+from time import perf_counter
+
+from app.core import logging_config
+from app.core.logging_config import JsonFormatter
+
+
+class PreviousJsonFormatter(logging.Formatter):
+    """The original implementation, kept here as the baseline."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_record = {
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        standard_attrs = {
+            "name", "msg", "args", "levelname", "levelno", "pathname",
+            "filename", "module", "exc_info", "exc_text", "stack_info",
+            "lineno", "funcName", "created", "msecs", "relativeCreated",
+            "thread", "threadName", "processName", "process",
+        }
+        for key, value in record.__dict__.items():
+            if key in standard_attrs:
+                continue
+            if key.startswith("_"):
+                continue
+            log_record[key] = value
+        return json.dumps(log_record, default=str)
+
+
+def make_record() -> logging.LogRecord:
+    record = logging.LogRecord(
+        "app.request", logging.INFO, __file__, 1, "request_completed", None, None
+    )
+    record.method = "GET"
+    record.path = "/transactions/"
+    record.status_code = 200
+    record.process_time_ms = 3.21
+    record.user_id = 42
+    return record
+
+
+def time_formatter(formatter: logging.Formatter, records: int) -> float:
+    record = make_record()
+    start = perf_counter()
+    for _ in range(records):
+        formatter.format(record)
+    return perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=200_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    encoder = "orjson" if logging_config.orjson is not None else "stdlib json"
+    variants = {
+        "previous": PreviousJsonFormatter(),
+        f"current ({encoder})": JsonFormatter(),
+    }
+    for name, formatter in variants.items():
+        best = min(time_formatter(formatter, args.records) for _ in range(args.rounds))
+        print(f"{name:>22}: {best / args.records * 1e6:6.2f} us/record")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Query plans and timings for the hot-path queries, before and after the
+0006_hot_path_indexes migration.
+
+Builds a throwaway SQLite database at the revision before it, seeds it,
+prints EXPLAIN QUERY PLAN plus a median timing for each query, then
+applies 0006_hot_path_indexes and prints them again.
+
+    cd backend && BUDGET_APP_SECRET_KEY=x python -m benchmarks.query_plans
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+from time import perf_counter
+
+from alembic import command
+from alembic.config import Config
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+# (label, sql, params) mirroring what the routers/helpers issue
+QUERIES = [
+    (
+        "list_transactions (first page)",
+        "SELECT id, amount, date FROM transactions WHERE user_id = ? "
+        "ORDER BY date DESC, id DESC LIMIT 51",
+        (7,),
+    ),
+    (
+        "list_transactions (date range)",
+        "SELECT id, amount, date FROM transactions WHERE user_id = ? "
+        "AND date >= ? AND date <= ? ORDER BY date DESC, id DESC LIMIT 51",
+        (7, "2024-03-01", "2024-03-31"),
+    ),
+    (
+        "export_transactions_csv",
+        "SELECT id, date, amount, type, description, category_id, budget_id "
+        "FROM transactions WHERE user_id = ? AND date >= ? AND date <= ? ORDER BY date, id",
+        (7, "2024-01-01", "2024-06-30"),
+    ),
+    (
+        "expense total for a period",
+        "SELECT sum(amount), count(*) FROM transactions WHERE user_id = ? "
+        "AND type = 'expense' AND date >= ? AND date <= ?",
+        (7, "2024-01-01", "2024-03-31"),
+    ),
+    (
+        "budget spend (counters check)",
+        "SELECT sum(amount), count(*) FROM transactions WHERE budget_id = ? "
+        "AND type = 'expense' AND date >= ? AND date <= ?",
+        (35, "2024-01-01", "2024-01-31"),
+    ),
+    (
+        "delete_category in-use check",
+        "SELECT id FROM transactions WHERE category_id = ? LIMIT 1",
+        (70,),
+    ),
+    (
+        "list_categories",
+        "SELECT id, name FROM categories WHERE user_id = ? ORDER BY name, id LIMIT 51",
+        (7,),
+    ),
+    (
+        "list_budgets",
+        "SELECT id, name FROM budgets WHERE user_id = ? ORDER BY start_date, id LIMIT 51",
+        (7,),
+    ),
+]
+
+
+def seed(path: str, users: int, tx_per_user: int) -> None:
+    rng = random.Random(42)
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO users (id, email, hashed_password) VALUES (?, ?, 'x')",
+        [(u, f"user{u}@example.com") for u in range(1, users + 1)],
+    )
+    conn.executemany(
+        "INSERT INTO categories (id, name, type, user_id) VALUES (?, ?, 'expense', ?)",
+        [(u * 10 + c, f"cat-{u}-{c}", u) for u in range(1, users + 1) for c in range(10)],
+    )
+    conn.executemany(
+        "INSERT INTO budgets (id, name, \"limit\", start_date, end_date, user_id) "
+        "VALUES (?, ?, 1000, ?, ?, ?)",
+        [
+            (u * 5 + m, f"budget-{m}", f"2024-{m + 1:02d}-01", f"2024-{m + 1:02d}-28", u)
+            for u in range(1, users + 1)
+            for m in range(5)
+        ],
+    )
+    start = date(2024, 1, 1)
+    rows = []
+    for u in range(1, users + 1):
+        for _ in range(tx_per_user):
+            day = start + timedelta(days=rng.randrange(365))
+            rows.append(
+                (
+                    f"{rng.uniform(1, 500):.2f}",
+                    day.isoformat(),
+                    u * 10 + rng.randrange(10),
+                    u * 5 + min(day.month - 1, 4) if rng.random() < 0.5 else None,
+                    u,
+                    "expense" if rng.random() < 0.8 else "income",
+                )
+            )
+    conn.executemany(
+        "INSERT INTO transactions (amount, date, category_id, budget_id, user_id, type) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+
+
+def report(path: str, repeat: int) -> None:
+    conn = sqlite3.connect(path)
+    for label, sql, params in QUERIES:
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            conn.execute(sql, params).fetchall()
+            timings.append((perf_counter() - start) * 1000.0)
+        print(f"  {label}: {statistics.median(timings):.3f} ms")
+        for line in plan:
+            print(f"      {line}")
+    conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--tx-per-user", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        config = Config(str(ALEMBIC_INI))
+        config.set_main_option("sqlalchemy.url", f"sqlite:///{path}")
+        config.attributes["configure_logger"] = False
+
+        command.upgrade(config, "0005_refresh_tokens")
+        seed(path, args.users, args.tx_per_user)
+        print(f"before indexes ({args.users * args.tx_per_user} transactions):")
+        report(path, args.repeat)
+
+        command.upgrade(config, "0006_hot_path_indexes")
+        print("after 0006_hot_path_indexes:")
+        report(path, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Micro-benchmark: request logging middleware overhead on ``/health``.
+
+Compares the previous ``BaseHTTPMiddleware`` implementation with the pure
+ASGI ``RequestLoggingMiddleware``. Requests are driven straight through the
+ASGI interface (no server, no sockets) and log output goes to a NullHandler,
+so the numbers isolate middleware cost.
+
+    cd backend && BUDGET_APP_SECRET_KEY=x python -m benchmarks.request_logging
+"""
+import argparse
+import asyncio
+import logging
+from time import perf_counter
+
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from app.middleware.request_logging import (
+    AUDITED_METHODS,
+    AUDITED_PATH_PREFIXES,
+    RequestLoggingMiddleware,
+)
+
+
+class BaseHTTPRequestLoggingMiddleware(BaseHTTPMiddleware):
+    """The pre-ASGI implementation, kept here as the baseline."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.logger = logging.getLogger("app.request")
+        self.audit_logger = logging.getLogger("audit")
+
+    async def dispatch(self, request: Request, call_next):
+        start = perf_counter()
+        response = await call_next(request)
+        process_time_ms = (perf_counter() - start) * 1000.0
+        user_id = getattr(request.state, "user_id", None)
+        self.logger.info(
+            "request_completed",
+            extra={
+                "method": request.method,
+                "path": request.url.path,
+                "status_code": response.status_code,
+                "process_time_ms": round(process_time_ms, 2),
+                "user_id": user_id,
+            },
+        )
+        if request.method in AUDITED_METHODS and request.url.path.startswith(
+            AUDITED_PATH_PREFIXES
+        ):
+            self.audit_logger.info(
+                "audit_event",
+                extra={
+                    "action": f"{request.method} {request.url.path}",
+                    "status_code": response.status_code,
+                    "user_id": user_id,
+                },
+            )
+        return response
+
+
+def build_app(middleware_class) -> FastAPI:
+    app = FastAPI()
+    if middleware_class is not None:
+        app.add_middleware(middleware_class)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    return app
+
+
+async def drive(app, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/health",
+        "raw_path": b"/health",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    for name in ("app", "audit"):
+        logger = logging.getLogger(name)
+        logger.handlers = [logging.NullHandler()]
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+
+    variants = {
+        "no middleware": None,
+        "BaseHTTPMiddleware": BaseHTTPRequestLoggingMiddleware,
+        "pure ASGI": RequestLoggingMiddleware,
+    }
+    for name, middleware_class in variants.items():
+        app = build_app(middleware_class)
+        asyncio.run(drive(app, 500))  # warm-up
+        best = min(asyncio.run(drive(app, args.requests)) for _ in range(args.rounds))
+        print(f"{name:>20}: {best / args.requests * 1e6:8.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import StaticPool, create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import StaticPool, create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
 
+from app import models
+from app.auth import principal_cache, token_versions
 from app.db import Base, get_db
 from app.main import app
+from app.pagination import count_cache
 
 # In-memory DB just for tests
 SQLALCHEMY_DATABASE_URL = "sqlite://"
@@ -33,13 +36,50 @@ def override_get_db():
 
 app.dependency_overrides[get_db] = override_get_db
 
+# The app lifespan would reload token versions from the real database on a
+# background thread; tests load the table themselves
+token_versions.refresh_seconds = 0
+
+
+# Relationships that every TransactionRead serializes. They have to arrive
+# with the row through loader options. A per-row lazy load fails the test.
+EAGER_ONLY = (models.Transaction.category,)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _forbid_lazy_loads(orm_execute_state):
+    if not orm_execute_state.is_select or orm_execute_state.lazy_loaded_from is None:
+        return
+    prop = orm_execute_state.loader_strategy_path[-1]
+    if any(prop is attr.property for attr in EAGER_ONLY):
+        raise AssertionError(f"Unexpected lazy load of {prop}")
+
 
 @pytest.fixture(autouse=True)
 def clean_db():
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    count_cache.clear()
+    principal_cache.clear()
+    token_versions.clear()
     yield
 
+@pytest.fixture()
+def query_counter():
+    """
+    Records every SQL statement sent to the test engine while active.
+    Clear it right before the call under test.
+    """
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", _record)
+
+
 @pytest.fixture()
 def client():
     return TestClient(app)
@@ -0,0 +1,115 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.db import Base, get_db
+from app.main import app
+
+
+@pytest.fixture()
+def async_client(tmp_path):
+    """
+    TestClient whose requests run on an AsyncSession (aiosqlite), i.e. the
+    BUDGET_APP_DB_ASYNC=true code path.
+    """
+    db_path = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+
+    # TestClient may run each request on a fresh event loop; don't pool
+    # aiosqlite connections across loops.
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool
+    )
+    AsyncTestingSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_async_db
+    try:
+        client = TestClient(app)
+        client.post(
+            "/auth/register",
+            json={"email": "async@example.com", "password": "asyncpassword"},
+        )
+        resp = client.post(
+            "/auth/login",
+            data={"username": "async@example.com", "password": "asyncpassword"},
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        assert resp.status_code == 200, resp.text
+        client.headers.update(
+            {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        )
+        yield client
+    finally:
+        app.dependency_overrides[get_db] = previous
+
+
+def test_async_session_crud_and_reports(async_client: TestClient):
+    cat_resp = async_client.post(
+        "/categories/", json={"name": "Food", "type": "expense"}
+    )
+    assert cat_resp.status_code == 201, cat_resp.text
+    category_id = cat_resp.json()["id"]
+
+    budget_resp = async_client.post(
+        "/budgets/",
+        json={
+            "name": "Month",
+            "limit": "100.00",
+            "start_date": "2025-01-01",
+            "end_date": "2025-01-31",
+        },
+    )
+    assert budget_resp.status_code == 201, budget_resp.text
+    budget_id = budget_resp.json()["id"]
+
+    tx_resp = async_client.post(
+        "/transactions/",
+        json={
+            "amount": "40.00",
+            "description": "Groceries",
+            "date": "2025-01-05",
+            "type": "expense",
+            "category_id": category_id,
+            "budget_id": budget_id,
+        },
+    )
+    assert tx_resp.status_code == 201, tx_resp.text
+    tx = tx_resp.json()
+    assert tx["category"]["name"] == "Food"
+
+    upd_resp = async_client.put(
+        f"/transactions/{tx['id']}", json={"amount": "45.00"}
+    )
+    assert upd_resp.status_code == 200, upd_resp.text
+    assert upd_resp.json()["amount"] == 45.0
+
+    list_resp = async_client.get("/transactions/")
+    assert list_resp.status_code == 200, list_resp.text
+    assert list_resp.json()["total"] == 1
+
+    status_resp = async_client.get(f"/budgets/{budget_id}/status")
+    assert status_resp.status_code == 200, status_resp.text
+    assert status_resp.json()["remaining"] == "55.00"
+
+    summary_resp = async_client.get("/reports/summary?group_by=category")
+    assert summary_resp.status_code == 200, summary_resp.text
+    assert summary_resp.json()["totals"]["total_expense"] == "45.00"
+
+    export_resp = async_client.get("/reports/transactions/export")
+    assert export_resp.status_code == 200
+    assert "Groceries" in export_resp.text
+
+    del_resp = async_client.delete(f"/transactions/{tx['id']}")
+    assert del_resp.status_code == 204
+    assert async_client.get(f"/transactions/{tx['id']}").status_code == 404
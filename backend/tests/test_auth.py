@@ -1,6 +1,29 @@
 # backend/tests/test_auth.py
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 
+from app import cli, models
+from app.auth import (
+    PasswordHasher,
+    create_access_token,
+    get_password_hash,
+    principal_cache,
+    pwd_context,
+    TokenVersionTable,
+    purge_refresh_tokens,
+    purge_user_tombstones,
+    revoke_tokens,
+    token_versions,
+)
+
+from .conftest import TestingSessionLocal
+
 
 def test_register_user(client: TestClient):
     payload = {
@@ -74,3 +97,385 @@ def test_login_invalid_credentials(client: TestClient):
     )
 
     assert resp.status_code == 401
+
+
+def _user_queries(statements):
+    return [s for s in statements if "FROM users" in s]
+
+
+def _use_legacy_token(client: TestClient) -> TestClient:
+    token = create_access_token({"sub": "user@example.com"})
+    client.headers.update({"Authorization": f"Bearer {token}"})
+    return client
+
+
+def test_authenticated_user_is_cached(auth_client: TestClient, query_counter):
+    _use_legacy_token(auth_client)
+    principal_cache.clear()
+
+    assert auth_client.get("/categories/").status_code == 200
+    assert len(_user_queries(query_counter)) == 1
+
+    query_counter.clear()
+    assert auth_client.get("/categories/").status_code == 200
+    assert _user_queries(query_counter) == []
+
+    stats = principal_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
+
+
+def test_password_change_invalidates_cached_user(auth_client: TestClient, query_counter):
+    _use_legacy_token(auth_client)
+    assert auth_client.get("/categories/").status_code == 200
+
+    with TestingSessionLocal() as db:
+        user = db.query(models.User).filter_by(email="user@example.com").one()
+        user.hashed_password = get_password_hash("newpassword123")
+        db.commit()
+
+    query_counter.clear()
+    assert auth_client.get("/categories/").status_code == 200
+    assert len(_user_queries(query_counter)) == 1
+
+
+def test_deleted_user_is_rejected_despite_cache(auth_client: TestClient):
+    assert auth_client.get("/categories/").status_code == 200
+
+    with TestingSessionLocal() as db:
+        user = db.query(models.User).filter_by(email="user@example.com").one()
+        db.delete(user)
+        db.commit()
+
+    resp = auth_client.get("/categories/")
+    assert resp.status_code == 401
+
+
+def test_rolled_back_change_keeps_cached_user(auth_client: TestClient, query_counter):
+    _use_legacy_token(auth_client)
+    assert auth_client.get("/categories/").status_code == 200
+
+    with TestingSessionLocal() as db:
+        user = db.query(models.User).filter_by(email="user@example.com").one()
+        user.hashed_password = get_password_hash("newpassword123")
+        db.flush()
+        db.rollback()
+
+    query_counter.clear()
+    assert auth_client.get("/categories/").status_code == 200
+    assert _user_queries(query_counter) == []
+
+
+def test_versioned_token_skips_user_query(auth_client: TestClient, query_counter):
+    # Users never revoked are at version 0 without being loaded at all
+    query_counter.clear()
+    assert auth_client.get("/categories/").status_code == 200
+    assert _user_queries(query_counter) == []
+
+
+def test_token_version_table_holds_only_revoked_users(client: TestClient):
+    for email in ("a@example.com", "b@example.com"):
+        client.post("/auth/register", json={"email": email, "password": "validpassword"})
+    with TestingSessionLocal() as db:
+        user = db.query(models.User).filter_by(email="b@example.com").one()
+        revoke_tokens(user)
+        db.commit()
+        revoked_id = user.id
+
+    token_versions.clear()
+    with TestingSessionLocal() as db:
+        token_versions.load(db)
+    assert token_versions._versions == {revoked_id: 1}
+    assert token_versions.get(revoked_id + 1000) == 0
+
+
+def test_newer_token_version_is_confirmed_from_db(auth_client: TestClient, query_counter):
+    old_token = auth_client.headers["Authorization"]
+    # Revoked by another process: this one has not reloaded its table yet
+    with TestingSessionLocal() as db:
+        db.query(models.User).update({models.User.token_version: 1})
+        db.commit()
+    assert token_versions.get(1) == 0
+    new_token = _login(auth_client)["access_token"]
+
+    query_counter.clear()
+    resp = auth_client.get("/categories/", headers={"Authorization": f"Bearer {new_token}"})
+    assert resp.status_code == 200
+    assert len(_user_queries(query_counter)) == 1
+    assert token_versions.get(1) == 1
+
+    resp = auth_client.get("/categories/", headers={"Authorization": old_token})
+    assert resp.status_code == 401
+
+
+def test_deleted_user_token_is_rejected(auth_client: TestClient):
+    with TestingSessionLocal() as db:
+        db.delete(db.query(models.User).filter_by(email="user@example.com").one())
+        db.commit()
+
+    assert auth_client.get("/categories/").status_code == 401
+
+
+def test_user_deleted_by_another_process_is_rejected_after_reload(auth_client: TestClient):
+    with TestingSessionLocal() as db:
+        db.delete(db.query(models.User).filter_by(email="user@example.com").one())
+        db.commit()
+    # This process never saw the delete
+    token_versions.clear()
+    assert auth_client.get("/categories/").status_code == 200
+
+    with TestingSessionLocal() as db:
+        token_versions.load(db)
+    assert auth_client.get("/categories/").status_code == 401
+
+
+def test_reused_user_id_lifts_tombstone(auth_client: TestClient):
+    with TestingSessionLocal() as db:
+        db.delete(db.query(models.User).filter_by(email="user@example.com").one())
+        db.commit()
+
+    # SQLite hands the freed id to the next user
+    auth_client.post("/auth/register", json={"email": "new@example.com", "password": "validpassword"})
+    token = _login(auth_client, "new@example.com", "validpassword")["access_token"]
+    with TestingSessionLocal() as db:
+        assert db.query(models.User).filter_by(email="new@example.com").one().id == 1
+        assert db.query(models.UserTombstone).count() == 0
+        token_versions.load(db)
+    resp = auth_client.get("/categories/", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 200
+
+
+def test_purge_user_tombstones_keeps_recent_ones(client: TestClient):
+    now = datetime.utcnow()
+    with TestingSessionLocal() as db:
+        db.add(models.UserTombstone(user_id=1, deleted_at=now - timedelta(days=1)))
+        db.add(models.UserTombstone(user_id=2, deleted_at=now))
+        db.commit()
+        assert purge_user_tombstones(db) == 1
+        db.commit()
+        assert [t.user_id for t in db.query(models.UserTombstone)] == [2]
+
+
+def test_token_versions_reload_in_background(client: TestClient):
+    client.post("/auth/register", json={"email": "a@example.com", "password": "validpassword"})
+    table = TokenVersionTable(refresh_seconds=0.01)
+    table.start(TestingSessionLocal)
+    try:
+        with TestingSessionLocal() as db:
+            db.query(models.User).update({models.User.token_version: 3})
+            db.commit()
+        deadline = time.monotonic() + 5
+        while table.get(1) != 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert table.get(1) == 3
+    finally:
+        table.stop()
+
+
+def test_revoked_token_is_rejected(auth_client: TestClient):
+    assert auth_client.get("/categories/").status_code == 200
+
+    with TestingSessionLocal() as db:
+        user = db.query(models.User).filter_by(email="user@example.com").one()
+        revoke_tokens(user)
+        db.commit()
+
+    resp = auth_client.get("/categories/")
+    assert resp.status_code == 401
+
+    login = auth_client.post(
+        "/auth/login",
+        data={"username": "user@example.com", "password": "testpassword123"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    token = login.json()["access_token"]
+    resp = auth_client.get(
+        "/categories/", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert resp.status_code == 200
+
+
+def test_legacy_email_token_still_accepted(auth_client: TestClient):
+    _use_legacy_token(auth_client)
+    assert auth_client.get("/categories/").status_code == 200
+
+
+def test_login_rehashes_password_with_outdated_cost(client: TestClient):
+    resp = client.post(
+        "/auth/register",
+        json={"email": "rehash@example.com", "password": "validpassword"},
+    )
+    assert resp.status_code == 201
+
+    handler = pwd_context.handler("pbkdf2_sha256")
+    with TestingSessionLocal() as db:
+        user = db.query(models.User).filter_by(email="rehash@example.com").one()
+        user.hashed_password = handler.using(rounds=1000).hash("validpassword")
+        db.commit()
+
+    resp = client.post(
+        "/auth/login",
+        data={"username": "rehash@example.com", "password": "validpassword"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    assert resp.status_code == 200, resp.text
+
+    with TestingSessionLocal() as db:
+        user = db.query(models.User).filter_by(email="rehash@example.com").one()
+        assert not pwd_context.needs_update(user.hashed_password)
+        assert pwd_context.verify("validpassword", user.hashed_password)
+
+
+def test_password_hasher_rejects_work_beyond_capacity():
+    hasher = PasswordHasher(workers=1, max_pending=0)
+    release = threading.Event()
+
+    async def scenario():
+        busy = asyncio.ensure_future(hasher.run(release.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as exc_info:
+            await hasher.run(lambda: None)
+        release.set()
+        await busy
+        return exc_info.value
+
+    try:
+        error = asyncio.run(scenario())
+    finally:
+        release.set()
+        hasher.shutdown()
+    assert error.status_code == 503
+
+
+def _login(client: TestClient, email: str = "user@example.com", password: str = "testpassword123"):
+    resp = client.post(
+        "/auth/login",
+        data={"username": email, "password": password},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def test_refresh_rotates_tokens(auth_client: TestClient):
+    tokens = _login(auth_client)
+    assert tokens["refresh_token"]
+
+    resp = auth_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert resp.status_code == 200, resp.text
+    rotated = resp.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+
+    resp = auth_client.get(
+        "/categories/", headers={"Authorization": f"Bearer {rotated['access_token']}"}
+    )
+    assert resp.status_code == 200
+
+    with TestingSessionLocal() as db:
+        stored = {row.token_hash for row in db.query(models.RefreshToken)}
+    assert tokens["refresh_token"] not in stored
+    assert rotated["refresh_token"] not in stored
+
+
+def test_reused_refresh_token_revokes_all_sessions(auth_client: TestClient):
+    tokens = _login(auth_client)
+    first = auth_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert first.status_code == 200
+
+    replay = auth_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert replay.status_code == 401
+
+    # The successor was revoked along with the rest of the user's tokens
+    resp = auth_client.post(
+        "/auth/refresh", json={"refresh_token": first.json()["refresh_token"]}
+    )
+    assert resp.status_code == 401
+
+
+def test_refresh_rejected_after_token_revocation(auth_client: TestClient):
+    tokens = _login(auth_client)
+
+    with TestingSessionLocal() as db:
+        user = db.query(models.User).filter_by(email="user@example.com").one()
+        revoke_tokens(user)
+        db.commit()
+
+    resp = auth_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert resp.status_code == 401
+
+
+def test_refresh_with_unknown_token_fails(client: TestClient):
+    resp = client.post("/auth/refresh", json={"refresh_token": "not-a-token"})
+    assert resp.status_code == 401
+
+
+def test_logout_revokes_access_and_refresh_tokens(auth_client: TestClient):
+    tokens = _login(auth_client)
+
+    resp = auth_client.post("/auth/logout")
+    assert resp.status_code == 204
+
+    assert auth_client.get("/categories/").status_code == 401
+    resp = auth_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert resp.status_code == 401
+    with TestingSessionLocal() as db:
+        live = db.query(models.RefreshToken).filter(models.RefreshToken.revoked_at.is_(None))
+        assert live.count() == 0
+
+
+def _add_refresh_rows(db, user_id, prefix):
+    now = datetime.utcnow()
+    rows = {
+        "expired": dict(expires_at=now - timedelta(seconds=1)),
+        "revoked_long_ago": dict(
+            expires_at=now + timedelta(days=20), revoked_at=now - timedelta(days=2)
+        ),
+        "just_rotated": dict(expires_at=now + timedelta(days=20), revoked_at=now),
+        "live": dict(expires_at=now + timedelta(days=20)),
+    }
+    for name, values in rows.items():
+        db.add(
+            models.RefreshToken(
+                token_hash=f"{prefix}-{name}", user_id=user_id, token_version=0, **values
+            )
+        )
+
+
+def _refresh_hashes(db):
+    return {row.token_hash for row in db.query(models.RefreshToken)}
+
+
+def test_issuing_refresh_token_purges_users_stale_tokens(auth_client: TestClient):
+    auth_client.post("/auth/register", json={"email": "b@example.com", "password": "validpassword"})
+    with TestingSessionLocal() as db:
+        db.query(models.RefreshToken).delete()
+        _add_refresh_rows(db, 1, "a")
+        _add_refresh_rows(db, 2, "b")
+        db.commit()
+
+    _login(auth_client)
+
+    with TestingSessionLocal() as db:
+        hashes = _refresh_hashes(db)
+    # The just-rotated token stays so a replay is still detected as reuse
+    assert {h for h in hashes if h.startswith("a-")} == {"a-just_rotated", "a-live"}
+    assert {h for h in hashes if h.startswith("b-")} == {
+        "b-expired", "b-revoked_long_ago", "b-just_rotated", "b-live",
+    }
+    assert len(hashes) == 7  # plus the token just issued
+
+
+def test_purge_refresh_tokens_command(client: TestClient, monkeypatch, capsys):
+    client.post("/auth/register", json={"email": "a@example.com", "password": "validpassword"})
+    with TestingSessionLocal() as db:
+        _add_refresh_rows(db, 1, "a")
+        db.commit()
+
+    monkeypatch.setattr(cli, "SessionLocal", TestingSessionLocal)
+    assert cli.main(["purge-refresh-tokens"]) == 0
+    assert "purged: 2 rows" in capsys.readouterr().out
+
+    with TestingSessionLocal() as db:
+        assert _refresh_hashes(db) == {"a-just_rotated", "a-live"}
+        assert purge_refresh_tokens(db) == 0
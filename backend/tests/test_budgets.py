@@ -119,3 +119,147 @@ def test_budget_status_tracks_expenses(auth_client):
     assert totals_expense == "150.00"
     assert remaining == "350.00"
     assert exceeded is False
+
+
+def test_list_budgets_cursor_pagination(auth_client):
+    today = date.today()
+    for i in range(3):
+        payload = {
+            "name": f"Budget {i}",
+            "limit": "100.00",
+            "start_date": (today + timedelta(days=i)).isoformat(),
+            "end_date": (today + timedelta(days=30)).isoformat(),
+        }
+        assert auth_client.post("/budgets/", json=payload).status_code == 201
+
+    first = auth_client.get("/budgets/?limit=2").json()
+    assert [b["name"] for b in first["items"]] == ["Budget 2", "Budget 1"]
+    assert first["next_cursor"] is not None
+
+    second = auth_client.get(f"/budgets/?limit=2&cursor={first['next_cursor']}").json()
+    assert [b["name"] for b in second["items"]] == ["Budget 0"]
+    assert second["next_cursor"] is None
+
+
+def test_list_budget_statuses(auth_client, query_counter):
+    budgets = []
+    for name, start, end in (
+        ("January", "2025-01-01", "2025-01-31"),
+        ("February", "2025-02-01", "2025-02-28"),
+        ("March", "2025-03-01", "2025-03-31"),
+    ):
+        resp = auth_client.post(
+            "/budgets/",
+            json={"name": name, "limit": "100.00", "start_date": start, "end_date": end},
+        )
+        assert resp.status_code == 201
+        budgets.append(resp.json()["id"])
+
+    jan, feb, _ = budgets
+    for amount, tx_date, budget_id in (
+        ("40.00", "2025-01-10", jan),
+        ("70.00", "2025-01-20", jan),
+        ("5.00", "2025-02-03", feb),
+        ("999.00", "2025-03-15", feb),  # outside February's period
+    ):
+        payload = {"amount": amount, "date": tx_date, "type": "expense", "budget_id": budget_id}
+        assert auth_client.post("/transactions/", json=payload).status_code == 201
+
+    query_counter.clear()
+    resp = auth_client.get("/budgets/status")
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+
+    # count + page: the principal comes from the auth cache and spend from the
+    # stored budget counters, so there is no user lookup or spend query
+    assert len(query_counter) == 2
+
+    assert data["total"] == 3
+    by_name = {item["budget"]["name"]: item for item in data["items"]}
+    assert [item["budget"]["name"] for item in data["items"]] == ["March", "February", "January"]
+    assert by_name["January"]["total_expense"] == "110.00"
+    assert by_name["January"]["exceeded"] is True
+    assert by_name["February"]["total_expense"] == "5.00"
+    assert by_name["February"]["remaining"] == "95.00"
+    assert by_name["March"]["total_expense"] == "0"
+
+    # Single-budget endpoint agrees
+    single = auth_client.get(f"/budgets/{jan}/status").json()
+    assert single["total_expense"] == by_name["January"]["total_expense"]
+
+
+def _status(auth_client, budget_id):
+    resp = auth_client.get(f"/budgets/{budget_id}/status")
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    return data["total_expense"], data["tx_count"]
+
+
+def test_budget_counters_follow_transaction_writes(auth_client):
+    first = auth_client.post(
+        "/budgets/",
+        json={"name": "A", "limit": "100.00", "start_date": "2025-01-01", "end_date": "2025-01-31"},
+    ).json()["id"]
+    second = auth_client.post(
+        "/budgets/",
+        json={"name": "B", "limit": "100.00", "start_date": "2025-01-01", "end_date": "2025-01-31"},
+    ).json()["id"]
+
+    tx = auth_client.post(
+        "/transactions/",
+        json={"amount": "30.00", "date": "2025-01-10", "type": "expense", "budget_id": first},
+    ).json()
+    assert _status(auth_client, first) == ("30.00", 1)
+
+    # amount change
+    auth_client.put(f"/transactions/{tx['id']}", json={"amount": "45.00"})
+    assert _status(auth_client, first) == ("45.00", 1)
+
+    # income does not count against a budget
+    auth_client.put(f"/transactions/{tx['id']}", json={"type": "income"})
+    assert _status(auth_client, first) == ("0", 0)
+    auth_client.put(f"/transactions/{tx['id']}", json={"type": "expense"})
+
+    # moved outside the period
+    auth_client.put(f"/transactions/{tx['id']}", json={"date": "2025-02-10"})
+    assert _status(auth_client, first) == ("0", 0)
+    auth_client.put(f"/transactions/{tx['id']}", json={"date": "2025-01-11"})
+
+    # relinked to another budget
+    auth_client.put(f"/transactions/{tx['id']}", json={"budget_id": second})
+    assert _status(auth_client, first) == ("0", 0)
+    assert _status(auth_client, second) == ("45.00", 1)
+
+    assert auth_client.delete(f"/transactions/{tx['id']}").status_code == 204
+    assert _status(auth_client, second) == ("0", 0)
+
+
+def test_check_budget_counters_repairs_drift(auth_client):
+    from app import models
+    from app.budget_counters import check_budget_counters
+
+    from .conftest import TestingSessionLocal
+
+    budget_id = auth_client.post(
+        "/budgets/",
+        json={"name": "A", "limit": "100.00", "start_date": "2025-01-01", "end_date": "2025-01-31"},
+    ).json()["id"]
+    auth_client.post(
+        "/transactions/",
+        json={"amount": "12.50", "date": "2025-01-10", "type": "expense", "budget_id": budget_id},
+    )
+
+    db = TestingSessionLocal()
+    try:
+        assert check_budget_counters(db) == []
+
+        db.query(models.Budget).update({"spent_total": 0, "tx_count": 0})
+        db.commit()
+
+        mismatches = check_budget_counters(db, repair=True)
+        assert [(m.budget_id, m.actual_count) for m in mismatches] == [(budget_id, 1)]
+        assert check_budget_counters(db) == []
+    finally:
+        db.close()
+
+    assert _status(auth_client, budget_id) == ("12.50", 1)
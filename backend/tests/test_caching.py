@@ -0,0 +1,59 @@
+from app import models
+from app.caching import GenerationalCache, InvalidateOnCommit
+
+from .conftest import TestingSessionLocal
+
+
+def test_load_started_before_invalidation_is_not_stored():
+    cache = GenerationalCache(ttl_seconds=60, max_entries=10)
+    generation = cache.generation()
+    cache.invalidate("a")
+    cache.set("a", "stale", generation)
+    assert cache.get("a") is None
+
+    cache.set("a", "fresh", cache.generation())
+    assert cache.get("a") == "fresh"
+
+
+def test_invalidation_only_affects_its_owner():
+    cache = GenerationalCache(ttl_seconds=60, max_entries=10)
+    generation = cache.generation()
+    cache.set("a", 1, generation, key="x")
+    cache.set("b", 2, generation, key="x")
+
+    cache.invalidate("a")
+    assert cache.get("a", "x") is None
+    assert cache.get("b", "x") == 2
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_invalidation_bookkeeping_is_bounded():
+    cache = GenerationalCache(ttl_seconds=60, max_entries=3)
+    generation = cache.generation()
+    for owner in range(100):
+        cache.invalidate(owner)
+    assert len(cache._invalidated) == 3
+
+    # A forgotten owner is checked against the floor, so a load that started
+    # before its invalidation still cannot be stored
+    cache.set(0, "stale", generation)
+    assert cache.get(0) is None
+    cache.set(0, "fresh", cache.generation())
+    assert cache.get(0) == "fresh"
+
+
+def test_invalidate_on_commit_waits_for_commit():
+    cache = GenerationalCache(ttl_seconds=60, max_entries=10)
+    invalidations = InvalidateOnCommit(cache, "test_cache_owners")
+    cache.set(1, "cached", cache.generation())
+
+    with TestingSessionLocal() as db:
+        invalidations.add(db, 1)
+        db.rollback()
+        assert cache.get(1) == "cached"
+
+        db.add(models.User(email="a@example.com", hashed_password="x"))
+        invalidations.add(db, 1)
+        assert cache.get(1) == "cached"
+        db.commit()
+    assert cache.get(1) is None
@@ -108,3 +108,16 @@ def test_delete_category_with_existing_transaction_fails(auth_client):
     assert del_resp.status_code == 400
     body = del_resp.json()
     assert "existing transactions" in body["detail"]
+
+
+def test_list_categories_cursor_pagination(auth_client):
+    for name in ["Travel", "Bills", "Rent"]:
+        resp = auth_client.post("/categories/", json={"name": name, "type": "expense"})
+        assert resp.status_code == 201
+
+    first = auth_client.get("/categories?limit=2").json()
+    assert [c["name"] for c in first["items"]] == ["Bills", "Rent"]
+
+    second = auth_client.get(f"/categories?limit=2&cursor={first['next_cursor']}").json()
+    assert [c["name"] for c in second["items"]] == ["Travel"]
+    assert second["next_cursor"] is None
@@ -0,0 +1,51 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.config import SQLITE_PROFILES, load_database_settings
+from app.db import install_sqlite_pragmas
+
+
+def test_production_profile_settings(monkeypatch):
+    monkeypatch.setenv("BUDGET_APP_DB_PROFILE", "production")
+    monkeypatch.setenv("BUDGET_APP_SQLITE_BUSY_TIMEOUT", "250")
+
+    settings = load_database_settings()
+
+    assert settings.split_read_pool is True
+    assert settings.sqlite_pragmas["journal_mode"] == "WAL"
+    assert settings.sqlite_pragmas["synchronous"] == "NORMAL"
+    assert settings.sqlite_pragmas["busy_timeout"] == "250"
+
+
+def test_invalid_pragma_value_rejected(monkeypatch):
+    monkeypatch.setenv("BUDGET_APP_SQLITE_JOURNAL_MODE", "WAL; DROP TABLE users")
+
+    with pytest.raises(RuntimeError):
+        load_database_settings()
+
+
+def test_pragmas_applied_on_connect_and_reader_is_read_only(tmp_path):
+    url = f"sqlite:///{tmp_path / 'profile.db'}"
+    pragmas = SQLITE_PROFILES["production"]
+
+    writer = create_engine(url)
+    install_sqlite_pragmas(writer, pragmas)
+    reader = create_engine(url)
+    install_sqlite_pragmas(reader, pragmas, read_only=True)
+
+    with writer.begin() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+
+    with reader.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM t")).scalar() == 1
+        with pytest.raises(OperationalError):
+            conn.execute(text("INSERT INTO t VALUES (2)"))
+
+    writer.dispose()
+    reader.dispose()
@@ -0,0 +1,166 @@
+import datetime as dt
+import io
+import json
+import logging
+import queue
+import sys
+from decimal import Decimal
+
+from fastapi.testclient import TestClient
+
+from app.config import LoggingSettings, logging_settings
+from app.core import logging_config
+from app.core.logging_config import (
+    BoundedQueueHandler,
+    JsonFormatter,
+    RequestLogSampler,
+    configure_logging,
+    shutdown_logging,
+)
+from app.main import app
+
+
+def _record(msg, *args):
+    return logging.LogRecord("app.test", logging.INFO, __file__, 1, msg, args, None)
+
+
+def test_drop_policy_discards_and_counts():
+    handler = BoundedQueueHandler(queue.Queue(maxsize=1), overflow="drop")
+    for i in range(3):
+        handler.handle(_record("event %s", i))
+
+    assert handler.dropped == 2
+    assert handler.queue.get_nowait().msg == "event 0"
+    handler.handle(_record("after"))
+    assert handler.queue.get_nowait().msg == "after"
+
+
+def test_count_policy_reports_dropped_records():
+    handler = BoundedQueueHandler(queue.Queue(maxsize=2), overflow="count")
+    for i in range(4):
+        handler.handle(_record("event %s", i))
+    handler.queue.get_nowait()
+    handler.queue.get_nowait()
+
+    handler.handle(_record("after"))
+    report = handler.queue.get_nowait()
+    assert report.getMessage() == "log_records_dropped"
+    assert report.dropped == 2
+    assert handler.queue.get_nowait().msg == "after"
+    assert handler.dropped == 2
+
+
+def test_queued_output_matches_direct_output(monkeypatch):
+    def capture(settings):
+        stream = io.StringIO()
+        monkeypatch.setattr(sys, "stdout", stream)
+        configure_logging(settings)
+        logging.getLogger("audit").info(
+            "audit_event", extra={"action": "POST /categories", "user_id": 7}
+        )
+        shutdown_logging()
+        return stream.getvalue()
+
+    try:
+        direct = capture(LoggingSettings(queue_size=0))
+        queued = capture(LoggingSettings(queue_size=10, overflow="block"))
+    finally:
+        monkeypatch.undo()
+        configure_logging(logging_settings)
+
+    assert queued == direct
+    assert json.loads(queued) == {
+        "level": "INFO",
+        "logger": "audit",
+        "message": "audit_event",
+        "action": "POST /categories",
+        "user_id": 7,
+    }
+
+
+def test_lifespan_shutdown_flushes_queue(monkeypatch):
+    stream = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", stream)
+    configure_logging(LoggingSettings(queue_size=100))
+    try:
+        with TestClient(app) as client:
+            assert client.get("/health").status_code == 200
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert any(line.get("message") == "request_completed" for line in lines)
+    finally:
+        monkeypatch.undo()
+        configure_logging(logging_settings)
+
+
+def test_records_after_shutdown_go_straight_to_stdout(monkeypatch):
+    stream = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", stream)
+    configure_logging(LoggingSettings(queue_size=1, overflow="block"))
+    try:
+        shutdown_logging()
+        for logger in (logging.getLogger(), logging.getLogger("uvicorn.error")):
+            assert not any(isinstance(h, BoundedQueueHandler) for h in logger.handlers)
+        # Would block forever on the full, undrained queue before the fix
+        logging.getLogger("uvicorn.error").info("Finished server process")
+        logging.getLogger("uvicorn.error").info("Shutting down")
+        messages = [json.loads(line)["message"] for line in stream.getvalue().splitlines()]
+        assert messages == ["Finished server process", "Shutting down"]
+    finally:
+        monkeypatch.undo()
+        configure_logging(logging_settings)
+
+
+def test_json_formatter_fields_match_stdlib_encoding(monkeypatch):
+    record = _record("request %s", "done")
+    record.status_code = 200
+    record.amount = Decimal("12.50")
+    record.when = dt.datetime(2024, 1, 2, 3, 4, 5)
+    record._private = "hidden"
+
+    fast = JsonFormatter().format(record)
+    monkeypatch.setattr(logging_config, "_dumps", logging_config._dumps_stdlib)
+    stdlib = JsonFormatter().format(record)
+
+    assert json.loads(fast) == json.loads(stdlib) == {
+        "level": "INFO",
+        "logger": "app.test",
+        "message": "request done",
+        "status_code": 200,
+        "amount": "12.50",
+        "when": "2024-01-02 03:04:05",
+    }
+
+
+def test_request_sampler_keeps_errors_and_unsampled_records():
+    sampler = RequestLogSampler(rate=0.0)
+
+    def request_record(status_code):
+        record = _record("request_completed")
+        record.status_code = status_code
+        return record
+
+    assert not sampler.filter(request_record(200))
+    assert sampler.filter(request_record(404))
+    assert sampler.filter(request_record(500))
+    assert sampler.filter(_record("Validation error"))
+    assert RequestLogSampler(rate=1.0).filter(request_record(200))
+
+
+def test_sampling_never_drops_audit_logs(monkeypatch):
+    stream = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", stream)
+    configure_logging(LoggingSettings(queue_size=0, request_sample_rate=0.0))
+    try:
+        request_logger = logging.getLogger("app.request")
+        request_logger.info("request_completed", extra={"status_code": 201})
+        request_logger.info("request_completed", extra={"status_code": 500})
+        logging.getLogger("audit").info("audit_event", extra={"status_code": 201})
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    finally:
+        monkeypatch.undo()
+        configure_logging(logging_settings)
+
+    assert [(line["logger"], line["status_code"]) for line in lines] == [
+        ("app.request", 500),
+        ("audit", 201),
+    ]
@@ -0,0 +1,65 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.metrics import REQUEST_LATENCY, REQUESTS_TOTAL, Histogram, _Metric
+
+
+def test_requests_are_labelled_by_route_template(auth_client: TestClient):
+    route = "/transactions/{transaction_id}"
+    before_count = REQUEST_LATENCY.count("GET", route)
+    before_404 = REQUESTS_TOTAL.value("GET", route, "404")
+
+    assert auth_client.get("/transactions/12345").status_code == 404
+    assert auth_client.get("/transactions/67890").status_code == 404
+
+    assert REQUEST_LATENCY.count("GET", route) == before_count + 2
+    assert REQUESTS_TOTAL.value("GET", route, "404") == before_404 + 2
+    assert REQUEST_LATENCY.count("GET", "/transactions/12345") == 0
+
+
+def test_unmatched_paths_share_one_label(client: TestClient):
+    before = REQUESTS_TOTAL.value("GET", "<unmatched>", "404")
+    assert client.get("/no-such-path").status_code == 404
+    assert REQUESTS_TOTAL.value("GET", "<unmatched>", "404") == before + 1
+
+
+def test_metrics_endpoint_exposes_prometheus_text(client: TestClient):
+    assert client.get("/health").status_code == 200
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    body = resp.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/health",le="+Inf"}' in body
+    assert 'http_requests_total{method="GET",route="/health",status="200"}' in body
+    # The /metrics request itself is in flight while rendering
+    assert "http_requests_in_flight 1" in body
+    assert "threadpool_workers_max 40" in body
+    assert "threadpool_tasks_waiting 0" in body
+    assert "password_hash_jobs 0" in body
+    assert "# TYPE principal_cache_hits_total counter" in body
+    assert "principal_cache_misses_total " in body
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("test_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, "/x")
+
+    assert list(histogram.samples()) == [
+        'test_seconds_bucket{route="/x",le="0.1"} 1',
+        'test_seconds_bucket{route="/x",le="1"} 3',
+        'test_seconds_bucket{route="/x",le="+Inf"} 4',
+        'test_seconds_sum{route="/x"} 6.05',
+        'test_seconds_count{route="/x"} 4',
+    ]
+
+
+def test_metric_without_samples_cannot_be_created():
+    class Incomplete(_Metric):
+        type_name = "gauge"
+
+    with pytest.raises(TypeError):
+        Incomplete("incomplete", "Forgot samples().")
@@ -0,0 +1,137 @@
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from decimal import Decimal
+
+from sqlalchemy import create_engine, inspect, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.budget_counters import check_budget_counters
+from app.db import Base
+from app.rollups import rebuild_daily_rollups
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+
+@pytest.fixture()
+def alembic_config(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("sqlalchemy.url", url)
+    config.attributes["configure_logger"] = False
+    return config, url
+
+
+def test_migrations_match_models(alembic_config):
+    config, url = alembic_config
+    command.upgrade(config, "head")
+
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        diff = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+    engine.dispose()
+    assert diff == []
+
+
+def test_hot_path_indexes_revision(alembic_config):
+    config, url = alembic_config
+    engine = create_engine(url)
+
+    command.upgrade(config, "0005_refresh_tokens")
+    before = {ix["name"] for ix in inspect(engine).get_indexes("transactions")}
+    assert "ix_transactions_user_id_date_id" not in before
+
+    command.upgrade(config, "0006_hot_path_indexes")
+    after = {ix["name"] for ix in inspect(engine).get_indexes("transactions")}
+    assert {
+        "ix_transactions_user_id_date_id",
+        "ix_transactions_user_id_type_date_amount",
+        "ix_transactions_budget_id_type_date",
+        "ix_transactions_category_id",
+    } <= after
+
+    command.downgrade(config, "0005_refresh_tokens")
+    assert {ix["name"] for ix in inspect(engine).get_indexes("transactions")} == before
+    engine.dispose()
+
+
+def test_amounts_migrate_to_integer_cents(alembic_config):
+    config, url = alembic_config
+    engine = create_engine(url)
+
+    command.upgrade(config, "0006_hot_path_indexes")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO users (id, email, hashed_password) VALUES (1, 'a@example.com', 'x')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO transactions (id, amount, date, user_id, type) "
+            "VALUES (1, 12.34, '2024-01-01', 1, 'expense'), (2, 0.1, '2024-01-02', 1, 'expense')"
+        )
+
+    command.upgrade(config, "0007_amounts_in_cents")
+    with engine.connect() as conn:
+        raw = conn.exec_driver_sql("SELECT amount FROM transactions ORDER BY id").scalars().all()
+    assert raw == [1234, 10]
+    with Session(engine) as db:
+        amounts = db.scalars(select(models.Transaction.amount).order_by(models.Transaction.id)).all()
+    assert amounts == [Decimal("12.34"), Decimal("0.10")]
+
+    command.downgrade(config, "0006_hot_path_indexes")
+    with engine.connect() as conn:
+        raw = conn.exec_driver_sql("SELECT amount FROM transactions ORDER BY id").scalars().all()
+    assert raw == [12.34, 0.1]
+    engine.dispose()
+
+
+def test_baseline_is_the_original_schema(alembic_config):
+    config, url = alembic_config
+    engine = create_engine(url)
+
+    command.upgrade(config, "0001_baseline")
+    inspector = inspect(engine)
+    assert set(inspector.get_table_names()) >= {"users", "categories", "budgets", "transactions"}
+    assert "daily_rollups" not in inspector.get_table_names()
+    assert "refresh_tokens" not in inspector.get_table_names()
+    assert "token_version" not in {c["name"] for c in inspector.get_columns("users")}
+    assert "spent_total" not in {c["name"] for c in inspector.get_columns("budgets")}
+    engine.dispose()
+
+
+def test_original_database_upgrades_and_backfills(alembic_config):
+    config, url = alembic_config
+    engine = create_engine(url)
+
+    # Data written by the original code, before any later revision existed
+    command.upgrade(config, "0001_baseline")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO users (id, email, hashed_password) VALUES (1, 'a@example.com', 'x')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO budgets (id, name, \"limit\", start_date, end_date, user_id) "
+            "VALUES (1, 'Food', 100, '2024-01-01', '2024-01-31', 1)"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO transactions (id, amount, date, user_id, type, budget_id) "
+            "VALUES (1, 12.34, '2024-01-05', 1, 'expense', 1), (2, 5, '2024-01-06', 1, 'expense', 1)"
+        )
+
+    command.upgrade(config, "head")
+    with Session(engine) as db:
+        assert db.get(models.User, 1).token_version == 0
+        assert db.scalars(select(models.RefreshToken)).all() == []
+
+        # The documented backfill steps
+        assert rebuild_daily_rollups(db) == 2
+        assert len(check_budget_counters(db, repair=True)) == 1
+        assert check_budget_counters(db) == []
+
+        budget = db.get(models.Budget, 1)
+        assert (budget.spent_total, budget.tx_count) == (Decimal("17.34"), 2)
+    engine.dispose()
@@ -137,3 +137,118 @@ def test_transactions_export_csv(auth_client: TestClient):
     assert "id,date,amount,type,description,category_id,budget_id" in body
     # Our transaction description should appear somewhere in the CSV
     assert "Test export" in body
+
+
+def test_transactions_export_streams_all_rows_in_chunks(auth_client: TestClient, monkeypatch):
+    from app.routers import reports
+
+    # Force several cursor partitions for a handful of rows
+    monkeypatch.setattr(reports, "EXPORT_CHUNK_SIZE", 2)
+
+    items = [
+        {
+            "amount": f"{i}.25",
+            "description": f"Row {i}",
+            "date": f"2025-03-0{i + 1}",
+            "type": "expense",
+        }
+        for i in range(5)
+    ]
+    bulk = auth_client.post("/transactions/bulk", json={"items": items})
+    assert bulk.status_code == 201, bulk.text
+
+    resp = auth_client.get(
+        "/reports/transactions/export?start_date=2025-03-02&end_date=2025-03-05"
+    )
+    assert resp.status_code == 200
+
+    lines = resp.text.strip().splitlines()
+    assert lines[0] == "id,date,amount,type,description,category_id,budget_id"
+    assert [line.split(",")[4] for line in lines[1:]] == ["Row 1", "Row 2", "Row 3", "Row 4"]
+    assert lines[1].split(",")[1:4] == ["2025-03-02", "1.25", "expense"]
+
+
+def test_summary_is_a_single_aggregate_query(auth_client: TestClient, query_counter):
+    food = auth_client.post("/categories", json={"name": "Food", "type": "expense"}).json()
+    for payload in (
+        {"amount": "20.00", "date": "2025-01-01", "type": "expense", "category_id": food["id"]},
+        {"amount": "500.00", "date": "2025-01-02", "type": "income"},
+    ):
+        assert auth_client.post("/transactions", json=payload).status_code == 201
+
+    for url in ("/reports/summary", "/reports/summary?group_by=category"):
+        query_counter.clear()
+        resp = auth_client.get(url)
+        assert resp.status_code == 200, resp.text
+
+        # Ignore the authenticated-user lookup; the report itself is one statement
+        report_queries = [sql for sql in query_counter if "FROM users" not in sql]
+        assert len(report_queries) == 1, report_queries
+
+        totals = resp.json()["totals"]
+        assert Decimal(totals["total_income"]) == Decimal("500.00")
+        assert Decimal(totals["total_expense"]) == Decimal("20.00")
+        assert Decimal(totals["net"]) == Decimal("480.00")
+
+
+def test_timeseries_monthly_fills_empty_buckets(auth_client: TestClient):
+    for payload in (
+        {"amount": "100.00", "date": "2025-01-15", "type": "income"},
+        {"amount": "30.00", "date": "2025-01-20", "type": "expense"},
+        {"amount": "12.00", "date": "2025-03-02", "type": "expense"},
+    ):
+        assert auth_client.post("/transactions", json=payload).status_code == 201
+
+    resp = auth_client.get(
+        "/reports/timeseries?bucket=month&start_date=2025-01-01&end_date=2025-04-30"
+    )
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+
+    assert data["bucket"] == "month"
+    assert len(data["series"]) == 1
+    points = data["series"][0]["points"]
+    assert [p["bucket_start"] for p in points] == [
+        "2025-01-01",
+        "2025-02-01",
+        "2025-03-01",
+        "2025-04-01",
+    ]
+    assert Decimal(points[0]["net"]) == Decimal("70.00")
+    assert points[0]["tx_count"] == 2
+    assert Decimal(points[1]["total_expense"]) == Decimal("0")
+    assert Decimal(points[2]["total_expense"]) == Decimal("12.00")
+
+
+def test_timeseries_weekly_by_category(auth_client: TestClient):
+    food = auth_client.post("/categories", json={"name": "Food", "type": "expense"}).json()
+    for payload in (
+        # 2025-01-06 is a Monday; 01-08 is the same ISO week, 01-13 the next
+        {"amount": "5.00", "date": "2025-01-06", "type": "expense", "category_id": food["id"]},
+        {"amount": "7.00", "date": "2025-01-08", "type": "expense", "category_id": food["id"]},
+        {"amount": "9.00", "date": "2025-01-13", "type": "expense"},
+    ):
+        assert auth_client.post("/transactions", json=payload).status_code == 201
+
+    resp = auth_client.get("/reports/timeseries?bucket=week&group_by=category&type=expense")
+    assert resp.status_code == 200, resp.text
+    series = {s["category_name"]: s["points"] for s in resp.json()["series"]}
+
+    assert [p["bucket_start"] for p in series["Food"]] == ["2025-01-06", "2025-01-13"]
+    assert Decimal(series["Food"][0]["total_expense"]) == Decimal("12.00")
+    assert Decimal(series["Food"][1]["total_expense"]) == Decimal("0")
+    assert Decimal(series[None][1]["total_expense"]) == Decimal("9.00")
+
+
+def test_summary_totals_are_exact_in_cents(auth_client: TestClient):
+    # 0.10 + 0.20 is not 0.30 in binary floating point; integer cents are exact
+    for amount in ("0.10", "0.20", "0.10", "0.20", "0.10", "0.20"):
+        resp = auth_client.post(
+            "/transactions/",
+            json={"amount": amount, "date": date.today().isoformat(), "type": "expense"},
+        )
+        assert resp.status_code == 201, resp.text
+
+    totals = auth_client.get("/reports/summary").json()["totals"]
+    assert totals["total_expense"] == "0.90"
+    assert totals["net"] == "-0.90"
@@ -0,0 +1,111 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.middleware.request_logging import RequestLoggingMiddleware
+
+from .conftest import engine
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture()
+def log_records():
+    """Captures records from the request and audit loggers (they don't propagate)."""
+    handler = _ListHandler()
+    loggers = [logging.getLogger("app.request"), logging.getLogger("audit")]
+    for logger in loggers:
+        logger.addHandler(handler)
+    yield handler.records
+    for logger in loggers:
+        logger.removeHandler(handler)
+
+
+def _completed(records):
+    return [r for r in records if r.getMessage() == "request_completed"]
+
+
+def test_request_log_fields(client: TestClient, log_records):
+    resp = client.get("/health")
+    assert resp.status_code == 200
+
+    (record,) = _completed(log_records)
+    assert record.name == "app.request"
+    assert record.method == "GET"
+    assert record.path == "/health"
+    assert record.status_code == 200
+    assert record.user_id is None
+    assert record.process_time_ms >= 0
+
+
+def test_request_log_includes_user_id_and_audit_event(auth_client: TestClient, log_records):
+    resp = auth_client.post("/categories/", json={"name": "Food", "type": "expense"})
+    assert resp.status_code == 201, resp.text
+
+    (record,) = _completed(log_records)
+    assert record.status_code == 201
+    assert record.user_id == 1
+
+    (audit,) = [r for r in log_records if r.name == "audit"]
+    assert audit.getMessage() == "audit_event"
+    assert audit.action == "POST /categories/"
+    assert audit.status_code == 201
+    assert audit.user_id == 1
+
+
+def test_reads_are_not_audited(auth_client: TestClient, log_records):
+    assert auth_client.get("/categories/").status_code == 200
+    assert [r for r in log_records if r.name == "audit"] == []
+
+
+def test_streaming_export_is_logged(auth_client: TestClient, log_records):
+    resp = auth_client.get("/reports/transactions/export")
+    assert resp.status_code == 200
+
+    (record,) = _completed(log_records)
+    assert record.path == "/reports/transactions/export"
+    assert record.status_code == 200
+
+
+def test_request_log_and_server_timing_report_sql(auth_client: TestClient, log_records):
+    resp = auth_client.get("/categories/")
+    assert resp.status_code == 200
+
+    (record,) = _completed(log_records)
+    assert record.db_query_count >= 1
+    assert record.db_time_ms >= 0
+    assert record.db_slowest_statement.startswith("SELECT")
+    assert not hasattr(record, "db_statements")
+
+    server_timing = resp.headers["server-timing"]
+    assert server_timing.startswith("db;dur=")
+    assert f'desc="{record.db_query_count} queries"' in server_timing
+
+
+def test_sql_debug_lists_every_statement(log_records):
+    debug_app = FastAPI()
+    debug_app.add_middleware(RequestLoggingMiddleware, sql_debug=True)
+
+    @debug_app.get("/two-queries")
+    def two_queries():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        return {}
+
+    resp = TestClient(debug_app).get("/two-queries")
+    assert resp.status_code == 200
+    assert 'desc="2 queries"' in resp.headers["server-timing"]
+
+    (record,) = _completed(log_records)
+    assert [s["statement"] for s in record.db_statements] == ["SELECT 1", "SELECT 2"]
@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+from sqlalchemy import select
+
+from app import models
+from app.rollups import rebuild_daily_rollups
+
+from .conftest import TestingSessionLocal
+
+
+def _rollups():
+    db = TestingSessionLocal()
+    try:
+        rows = db.execute(
+            select(
+                models.DailyRollup.date,
+                models.DailyRollup.category_key,
+                models.DailyRollup.type,
+                models.DailyRollup.total_amount,
+                models.DailyRollup.tx_count,
+            ).order_by(
+                models.DailyRollup.date,
+                models.DailyRollup.category_key,
+                models.DailyRollup.type,
+            )
+        ).all()
+        return [(d.isoformat(), c, t, Decimal(a), n) for d, c, t, a, n in rows]
+    finally:
+        db.close()
+
+
+def test_rollups_follow_create_update_delete(auth_client):
+    food = auth_client.post("/categories", json={"name": "Food", "type": "expense"}).json()
+
+    r1 = auth_client.post(
+        "/transactions",
+        json={"amount": "10.00", "date": "2025-01-01", "type": "expense", "category_id": food["id"]},
+    )
+    r2 = auth_client.post(
+        "/transactions",
+        json={"amount": "5.00", "date": "2025-01-01", "type": "expense", "category_id": food["id"]},
+    )
+    assert r1.status_code == 201 and r2.status_code == 201
+    assert _rollups() == [("2025-01-01", food["id"], "expense", Decimal("15.00"), 2)]
+
+    # Move one transaction to another day and uncategorize it
+    upd = auth_client.put(
+        f"/transactions/{r2.json()['id']}",
+        json={"amount": "7.00", "date": "2025-01-02", "category_id": None},
+    )
+    assert upd.status_code == 200, upd.text
+    assert _rollups() == [
+        ("2025-01-01", food["id"], "expense", Decimal("10.00"), 1),
+        ("2025-01-02", 0, "expense", Decimal("7.00"), 1),
+    ]
+
+    assert auth_client.delete(f"/transactions/{r1.json()['id']}").status_code == 204
+    assert _rollups() == [("2025-01-02", 0, "expense", Decimal("7.00"), 1)]
+
+    bulk = auth_client.post(
+        "/transactions/bulk",
+        json={"items": [{"amount": "3.00", "date": "2025-01-02", "type": "expense"}] * 2},
+    )
+    assert bulk.status_code == 201, bulk.text
+    assert _rollups() == [("2025-01-02", 0, "expense", Decimal("13.00"), 3)]
+
+    summary = auth_client.get("/reports/summary?group_by=category").json()
+    assert Decimal(summary["totals"]["total_expense"]) == Decimal("13.00")
+    assert summary["by_category"][0]["category_id"] is None
+
+
+def test_rebuild_daily_rollups_matches_incremental(auth_client):
+    for payload in (
+        {"amount": "10.00", "date": "2025-01-01", "type": "expense"},
+        {"amount": "90.00", "date": "2025-01-01", "type": "income"},
+        {"amount": "4.50", "date": "2025-01-03", "type": "expense"},
+    ):
+        assert auth_client.post("/transactions", json=payload).status_code == 201
+
+    incremental = _rollups()
+
+    db = TestingSessionLocal()
+    try:
+        db.query(models.DailyRollup).delete()
+        db.commit()
+        assert rebuild_daily_rollups(db) == 3
+    finally:
+        db.close()
+
+    assert _rollups() == incremental
@@ -0,0 +1,79 @@
+from collections import deque
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import security_settings
+from app.slow_queries import normalize_sql, parameter_shape, slow_query_log
+
+from .conftest import engine
+
+
+@pytest.fixture()
+def record_all_queries(monkeypatch):
+    """Record every statement on the test engine as slow."""
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 1e-9)
+    slow_query_log.clear()
+    slow_query_log.install(engine)
+    yield slow_query_log
+    slow_query_log.uninstall(engine)
+    slow_query_log.clear()
+
+
+@pytest.fixture()
+def admin_client(auth_client: TestClient, monkeypatch) -> TestClient:
+    monkeypatch.setattr(security_settings, "admin_emails", ["user@example.com"])
+    return auth_client
+
+
+def test_normalize_sql_replaces_literals_and_in_lists():
+    sql = "SELECT *\n  FROM t WHERE a = 'x''y' AND b = 42 AND c IN (?, ?, ?) LIMIT ?"
+    assert normalize_sql(sql) == "SELECT * FROM t WHERE a = ? AND b = ? AND c IN (?, ...) LIMIT ?"
+
+
+def test_parameter_shape_never_includes_values():
+    assert parameter_shape((1, "secret", None), False) == "(int, str, NULL)"
+    assert parameter_shape({"email": "a@b.c"}, False) == "{email: str}"
+    assert parameter_shape([(1, 2.5), (2, 3.5)], True) == "(int, float) x2"
+
+
+def test_slow_queries_capture_plan_once(admin_client: TestClient, record_all_queries):
+    assert admin_client.get("/transactions/").status_code == 200
+    assert admin_client.get("/transactions/").status_code == 200
+
+    resp = admin_client.get("/admin/slow-queries")
+    assert resp.status_code == 200, resp.text
+    items = resp.json()["items"]
+
+    tx_queries = [i for i in items if i["statement"].startswith("SELECT transactions.")]
+    assert len(tx_queries) == 2
+    assert tx_queries[0]["plan"] == tx_queries[1]["plan"]
+    assert any("ix_transactions_user_id_date_id" in line for line in tx_queries[0]["plan"])
+    assert tx_queries[0]["full_scan"] is False
+    assert "user@example.com" not in str(items)
+
+
+def test_slow_query_flags_full_scans(record_all_queries):
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT id FROM transactions WHERE description = 'x'")
+
+    (entry,) = record_all_queries.entries()
+    assert entry.statement == "SELECT id FROM transactions WHERE description = ?"
+    assert entry.plan == ["SCAN transactions"]
+    assert entry.full_scan is True
+
+
+def test_slow_query_ring_is_bounded(record_all_queries, monkeypatch):
+    monkeypatch.setattr(record_all_queries, "_entries", deque(maxlen=3))
+    with engine.connect() as conn:
+        for i in range(5):
+            conn.exec_driver_sql(f"SELECT {i}")
+
+    entries = record_all_queries.entries()
+    assert len(entries) == 3
+    assert [e.statement for e in entries] == ["SELECT ?"] * 3
+
+
+def test_slow_queries_require_admin(auth_client: TestClient):
+    resp = auth_client.get("/admin/slow-queries")
+    assert resp.status_code == 403
@@ -154,3 +154,285 @@ def test_delete_transaction(auth_client):
     # verify it is actually gone
     get_resp = auth_client.get(f"/transactions/{tx_id}")
     assert get_resp.status_code == 404
+
+
+def test_list_transactions_cursor_pagination(auth_client):
+    # Two share a date so the id tiebreak is exercised
+    dates = ["2025-01-01", "2025-01-02", "2025-01-02", "2025-01-03", "2025-01-04"]
+    for i, d in enumerate(dates):
+        payload = {
+            "amount": 1.0 + i,
+            "description": f"Tx {i}",
+            "date": d,
+            "type": "expense",
+        }
+        resp = auth_client.post("/transactions", json=payload)
+        assert resp.status_code == 201, resp.text
+
+    offset_resp = auth_client.get("/transactions?limit=5")
+    expected = [tx["id"] for tx in offset_resp.json()["items"]]
+    assert offset_resp.json()["next_cursor"] is None
+
+    seen = []
+    cursor = None
+    while True:
+        url = "/transactions?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        resp = auth_client.get(url)
+        assert resp.status_code == 200, resp.text
+        data = resp.json()
+        assert data["total"] == 5
+        seen.extend(tx["id"] for tx in data["items"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == expected
+
+
+def test_list_transactions_invalid_cursor(auth_client):
+    resp = auth_client.get("/transactions?cursor=not-a-cursor")
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Invalid cursor."
+
+
+def test_list_transactions_rejects_cursor_with_offset(auth_client):
+    for i in range(3):
+        auth_client.post(
+            "/transactions",
+            json={"amount": 1.0, "date": f"2025-01-0{i + 1}", "type": "expense"},
+        )
+    cursor = auth_client.get("/transactions?limit=1").json()["next_cursor"]
+
+    resp = auth_client.get(f"/transactions?limit=1&offset=1&cursor={cursor}")
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Use either cursor or offset, not both."
+
+    # offset=0 is the default and stays allowed
+    resp = auth_client.get(f"/transactions?limit=1&offset=0&cursor={cursor}")
+    assert resp.status_code == 200
+
+
+def _create_expenses(auth_client, n):
+    for i in range(n):
+        payload = {
+            "amount": 1.0 + i,
+            "description": f"Tx {i}",
+            "date": f"2025-01-0{i + 1}",
+            "type": "expense",
+        }
+        resp = auth_client.post("/transactions", json=payload)
+        assert resp.status_code == 201, resp.text
+
+
+def test_list_transactions_window_total(auth_client):
+    _create_expenses(auth_client, 3)
+
+    first = auth_client.get("/transactions?limit=2&include_total=window").json()
+    assert first["total"] == 3
+    assert first["total_accuracy"] == "exact"
+    assert len(first["items"]) == 2
+
+    # The window is computed before the keyset seek, so it stays the full total
+    second = auth_client.get(
+        f"/transactions?limit=2&include_total=window&cursor={first['next_cursor']}"
+    ).json()
+    assert second["total"] == 3
+    assert [tx["description"] for tx in second["items"]] == ["Tx 0"]
+
+
+def test_list_transactions_without_total(auth_client):
+    _create_expenses(auth_client, 2)
+
+    data = auth_client.get("/transactions?include_total=none").json()
+    assert data["total"] is None
+    assert data["total_accuracy"] == "omitted"
+    assert len(data["items"]) == 2
+
+
+def test_list_transactions_cached_total_invalidated_on_write(auth_client):
+    _create_expenses(auth_client, 2)
+
+    first = auth_client.get("/transactions?include_total=cached").json()
+    assert (first["total"], first["total_accuracy"]) == (2, "exact")
+
+    second = auth_client.get("/transactions?include_total=cached").json()
+    assert (second["total"], second["total_accuracy"]) == (2, "estimated")
+
+    _create_expenses(auth_client, 1)
+
+    third = auth_client.get("/transactions?include_total=cached").json()
+    assert (third["total"], third["total_accuracy"]) == (3, "exact")
+
+
+def _create_categorized_expenses(auth_client, n):
+    ids = []
+    for i in range(n):
+        category = auth_client.post(
+            "/categories/", json={"name": f"Cat {i}", "type": "expense"}
+        ).json()
+        resp = auth_client.post(
+            "/transactions/",
+            json={
+                "amount": 1.0 + i,
+                "description": f"Tx {i}",
+                "date": f"2025-01-0{i + 1}",
+                "type": "expense",
+                "category_id": category["id"],
+            },
+        )
+        assert resp.status_code == 201, resp.text
+        assert resp.json()["category"]["name"] == f"Cat {i}"
+        ids.append(resp.json()["id"])
+    return ids
+
+
+def test_list_transactions_loads_categories_with_the_page(auth_client, query_counter):
+    _create_categorized_expenses(auth_client, 4)
+
+    for include_total in ("exact", "window", "none"):
+        query_counter.clear()
+        resp = auth_client.get(f"/transactions?include_total={include_total}")
+        assert resp.status_code == 200, resp.text
+        names = [tx["category"]["name"] for tx in resp.json()["items"]]
+        assert names == ["Cat 3", "Cat 2", "Cat 1", "Cat 0"]
+        # Categories come joined into the page query, not one SELECT per row
+        category_selects = [
+            s for s in query_counter if s.lstrip().startswith("SELECT categories.")
+        ]
+        assert category_selects == []
+
+
+def test_get_and_update_transaction_include_category(auth_client):
+    (tx_id,) = _create_categorized_expenses(auth_client, 1)
+    other = auth_client.post(
+        "/categories/", json={"name": "Other", "type": "expense"}
+    ).json()
+
+    resp = auth_client.get(f"/transactions/{tx_id}")
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["category"]["name"] == "Cat 0"
+
+    resp = auth_client.put(f"/transactions/{tx_id}", json={"category_id": other["id"]})
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["category"]["name"] == "Other"
+
+    budget = auth_client.post(
+        "/budgets/",
+        json={"name": "Jan", "limit": 100, "start_date": "2025-01-01", "end_date": "2025-01-31"},
+    ).json()
+    auth_client.put(f"/transactions/{tx_id}", json={"budget_id": budget["id"], "amount": 10})
+    auth_client.post(
+        "/transactions/",
+        json={"amount": 2, "date": "2025-01-02", "type": "expense", "budget_id": budget["id"]},
+    )
+
+    resp = auth_client.put(f"/transactions/{tx_id}", json={"category_id": None})
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["category"] is None
+
+    # Clearing the category must not orphan-delete the row, and the derived
+    # rollups/budget counters must still match the transactions table
+    resp = auth_client.get(f"/transactions/{tx_id}")
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["category"] is None
+    assert resp.json()["category_id"] is None
+
+    totals = auth_client.get("/reports/summary").json()["totals"]
+    assert float(totals["total_expense"]) == 12.0
+
+    status = auth_client.get(f"/budgets/{budget['id']}/status").json()
+    assert (float(status["total_expense"]), status["tx_count"]) == (12.0, 2)
+
+
+def _statements_on(statements, table):
+    return [
+        s.split(None, 1)[0]
+        for s in statements
+        if f"FROM {table}" in s or f"INTO {table}" in s or s.startswith(f"UPDATE {table}")
+    ]
+
+
+def test_transaction_writes_read_back_with_returning(auth_client, query_counter):
+    payload = {"amount": 5.0, "date": "2025-01-01", "type": "expense"}
+
+    query_counter.clear()
+    created = auth_client.post("/transactions/", json=payload)
+    assert created.status_code == 201, created.text
+    assert created.json()["created_at"] is not None
+    # The INSERT returns the server defaults; no SELECT of the new row
+    assert _statements_on(query_counter, "transactions") == ["INSERT"]
+    assert "RETURNING" in next(s for s in query_counter if s.startswith("INSERT INTO transactions"))
+
+    query_counter.clear()
+    updated = auth_client.put(
+        f"/transactions/{created.json()['id']}", json={"description": "Lunch"}
+    )
+    assert updated.status_code == 200, updated.text
+    assert updated.json()["description"] == "Lunch"
+    # Load, then UPDATE ... RETURNING updated_at
+    assert _statements_on(query_counter, "transactions") == ["SELECT", "UPDATE"]
+    assert "RETURNING" in next(s for s in query_counter if s.startswith("UPDATE transactions"))
+
+
+def test_bulk_create_transactions(auth_client):
+    cat_resp = auth_client.post("/categories/", json={"name": "Food", "type": "expense"})
+    assert cat_resp.status_code == 201
+    category_id = cat_resp.json()["id"]
+
+    items = [
+        {
+            "amount": f"{i + 1}.50",
+            "description": f"Import {i}",
+            "date": "2025-02-01",
+            "type": "expense",
+            "category_id": category_id,
+        }
+        for i in range(50)
+    ]
+    resp = auth_client.post("/transactions/bulk", json={"items": items})
+    assert resp.status_code == 201, resp.text
+    data = resp.json()
+
+    assert data["created"] == 50
+    assert data["failed"] == 0
+    assert [r["index"] for r in data["results"]] == list(range(50))
+    assert all(r["status"] == "created" and r["id"] for r in data["results"])
+
+    listed = auth_client.get("/transactions?limit=1").json()
+    assert listed["total"] == 50
+
+
+def test_bulk_create_atomic_rejects_whole_batch(auth_client):
+    items = [
+        {"amount": "1.00", "date": "2025-02-01", "type": "expense"},
+        {"amount": "2.00", "date": "2025-02-01", "type": "expense", "category_id": 999},
+    ]
+    resp = auth_client.post("/transactions/bulk", json={"items": items, "mode": "atomic"})
+    assert resp.status_code == 400, resp.text
+    data = resp.json()
+
+    assert data["created"] == 0
+    assert data["results"][0]["status"] == "skipped"
+    assert data["results"][1]["status"] == "failed"
+    assert data["results"][1]["error"] == "Category does not exist."
+    assert auth_client.get("/transactions").json()["total"] == 0
+
+
+def test_bulk_create_partial_inserts_valid_items(auth_client):
+    items = [
+        {"amount": "1.00", "date": "2025-02-01", "type": "expense"},
+        {"amount": "2.00", "date": "2025-02-01", "type": "expense", "budget_id": 999},
+        {"amount": "3.00", "date": "2025-02-02", "type": "income"},
+    ]
+    resp = auth_client.post("/transactions/bulk", json={"items": items, "mode": "partial"})
+    assert resp.status_code == 201, resp.text
+    data = resp.json()
+
+    assert (data["created"], data["failed"]) == (2, 1)
+    assert [r["status"] for r in data["results"]] == ["created", "failed", "created"]
+    assert data["results"][1]["error"] == "Budget does not exist."
+
+    created_id = data["results"][2]["id"]
+    get_resp = auth_client.get(f"/transactions/{created_id}")
+    assert get_resp.status_code == 200
+    assert get_resp.json()["amount"] == 3.0